@@ -1,82 +1,345 @@
+import itertools
+import os
 import random
+import threading
 import time
-from math import sqrt
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from math import isqrt
+
+try:
+    import gmpy2
+    from gmpy2 import mpz, powmod
+except ImportError:
+    # gmpy2 is optional; fall back to CPython's built-in big integers
+    gmpy2 = None
+    mpz = int
+    powmod = pow
+
+# Primes checked directly before any Miller-Rabin work is done
+SMALL_PRIMES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47, 53)
+
+# Gaps between consecutive integers coprime to 2*3*5*7 = 210, starting at 1.
+# Walking these from 1 visits 11, 13, 17, 19, ... and skips every multiple
+# of 2, 3, 5 and 7 (48 candidates per 210 integers).
+WHEEL_DIFFS = (10, 2, 4, 2, 4, 6, 2, 6, 4, 2, 4, 6, 6, 2, 6, 4, 2, 6,
+               4, 6, 8, 4, 2, 4, 2, 4, 8, 6, 4, 6, 2, 4, 6, 2, 6, 6,
+               4, 2, 4, 6, 2, 6, 4, 2, 4, 2, 10, 2)
+
+# Residues mod 30 coprime to 2, 3 and 5 - the only candidates the wheel-30
+# sieve stores (8 of every 30 integers)
+WHEEL30_RESIDUES = (1, 7, 11, 13, 17, 19, 23, 29)
+WHEEL30_INDEX = {r: i for i, r in enumerate(WHEEL30_RESIDUES)}
+
+# Sieve of Atkin quadratic-form filters, indexed by value mod 12
+MOD12_1_5 = tuple(r in (1, 5) for r in range(12))
+MOD12_7 = tuple(r == 7 for r in range(12))
+MOD12_11 = tuple(r == 11 for r in range(12))
+
+# Largest trial divisor tried by the wheel pre-filter
+TRIAL_DIVISION_LIMIT = 1000
+
+# Witness rounds run in parallel threads above this size (only with gmpy2,
+# whose modexp can release the GIL, and only on multi-core machines). Below
+# ~2048 bits a round takes a few ms or less and thread start-up eats the gain
+PARALLEL_MR_BITS = 2048
+
+# (bound, bases): Miller-Rabin with these witnesses is exact for all n < bound
+DETERMINISTIC_BASES = (
+    (2_047, (2,)),
+    (1_373_653, (2, 3)),
+    (9_080_191, (31, 73)),
+    (3_215_031_751, (2, 3, 5, 7)),
+    (4_759_123_141, (2, 7, 61)),
+    (1 << 64, (2, 325, 9375, 28178, 450775, 9780504, 1795265022)),
+    (3_317_044_064_679_887_385_961_981,
+     (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)),
+)
 
 def miller_rabin_pass(a, s, d, n):
     """
     Single pass of Miller-Rabin primality test
     """
-    x = pow(a, d, n)
-    if x == 1 or x == n - 1:
+    n_minus_1 = n - 1
+    x = powmod(a, d, n)
+    if x == 1 or x == n_minus_1:
         return True
     for _ in range(s - 1):
-        x = pow(x, 2, n)
+        x = x * x % n
         if x == 1:
             return False
-        if x == n - 1:
+        if x == n_minus_1:
             return True
     return False
 
+def wheel_trial_division(n, limit=TRIAL_DIVISION_LIMIT):
+    """
+    Cheap pre-filter for Miller-Rabin using the 2/3/5/7 wheel.
+    Returns False if a small factor is found, True if n is proven prime
+    (no factor up to sqrt(n)) and None if the limit was reached first.
+    """
+    for p in SMALL_PRIMES:
+        if n % p == 0:
+            return n == p
+    candidate = 1
+    for d in itertools.cycle(WHEEL_DIFFS):
+        candidate += d
+        if candidate * candidate > n:
+            return True
+        if candidate > limit:
+            return None
+        if n % candidate == 0:
+            return False
+
+def miller_rabin_bases(n, k):
+    """
+    Witnesses to use for n: a fixed deterministic set when n is small
+    enough, otherwise k random bases (probabilistic test)
+
+    >>> miller_rabin_bases(3_215_031_750, 5)
+    (2, 3, 5, 7)
+    >>> miller_rabin_bases(3_215_031_751, 5)
+    (2, 7, 61)
+    """
+    for bound, bases in DETERMINISTIC_BASES:
+        if n < bound:
+            return bases
+    return [random.randint(2, n - 2) for _ in range(k)]
+
+def _allow_gmpy2_gil_release():
+    """
+    Thread initializer: let gmpy2 drop the GIL during big-number arithmetic
+    in this (worker) thread
+    """
+    context = gmpy2.context()
+    context.allow_release_gil = True
+    gmpy2.set_context(context)
+
+def parallel_miller_rabin(bases, s, d, n):
+    """
+    Run independent Miller-Rabin witness rounds concurrently.
+    Stops as soon as any witness proves n composite.
+
+    Forced on for small numbers (with gmpy2 installed) by pretending to
+    have several cores and dropping the size threshold:
+
+    >>> from unittest import mock
+    >>> with mock.patch('os.cpu_count', return_value=4), \\
+    ...         mock.patch(__name__ + '.PARALLEL_MR_BITS', 0), \\
+    ...         mock.patch(__name__ + '.parallel_miller_rabin',
+    ...                    wraps=parallel_miller_rabin) as spy:
+    ...     results = (is_prime_miller_rabin(2**89 - 1),
+    ...                is_prime_miller_rabin((2**61 - 1) * (2**89 - 1)))
+    >>> results, spy.called == (gmpy2 is not None)
+    ((True, False), True)
+    """
+    composite_found = threading.Event()
+
+    def witness_round(a):
+        # Rounds that have not started yet are skipped once n is known composite
+        if composite_found.is_set():
+            return True
+        return miller_rabin_pass(a, s, d, n)
+
+    # At most one worker per core, so later rounds queue behind the first
+    # ones and can be skipped when an early round finds a witness
+    pool = ThreadPoolExecutor(max_workers=min(len(bases), os.cpu_count() or 1),
+                              initializer=_allow_gmpy2_gil_release)
+    try:
+        futures = [pool.submit(witness_round, a) for a in bases]
+        for future in as_completed(futures):
+            if not future.result():
+                composite_found.set()
+                # Return without waiting for the rounds still running
+                pool.shutdown(wait=False, cancel_futures=True)
+                return False
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    return True
+
 def is_prime_miller_rabin(n, k=5):
     """
-    Miller-Rabin primality test for a single number
+    Miller-Rabin primality test for a single number.
+    Deterministic below 3.3 * 10**24; k random rounds above that.
+
+    Strong pseudoprimes to the smaller base sets are still rejected,
+    including one to every prime base up to 37:
+
+    >>> is_prime_miller_rabin(318665857834031151167461)
+    False
+    >>> is_prime_miller_rabin(3825123056546413051)
+    False
+    >>> is_prime_miller_rabin(3215031751), is_prime_miller_rabin(2152302898747)
+    (False, False)
+    >>> is_prime_miller_rabin(2**89 - 1)
+    True
     """
     if n in (2, 3):
         return True
-    if n <= 1 or n % 2 == 0:
+    if n <= 1:
         return False
+    # Reject numbers with a small factor before paying for any modexp
+    small_result = wheel_trial_division(n)
+    if small_result is not None:
+        return small_result
+    # Convert once so every modexp below runs on GMP integers when available
+    n = mpz(n)
     s = 0
     d = n - 1
     while d % 2 == 0:
         d //= 2
         s += 1
-    for _ in range(k):
-        a = random.randint(2, n - 2)
+    bases = [a % n for a in miller_rabin_bases(n, k) if a % n != 0]
+    if (gmpy2 is not None and len(bases) > 1 and (os.cpu_count() or 1) > 1
+            and n.bit_length() > PARALLEL_MR_BITS):
+        return parallel_miller_rabin(bases, s, d, n)
+    for a in bases:
         if not miller_rabin_pass(a, s, d, n):
             return False
     return True
 
-def sieve_of_eratosthenes_single(n):
+def eratosthenes_sieve(limit):
     """
-    Test primality of a single number using Sieve of Eratosthenes
+    Odd-only Sieve of Eratosthenes over 0..limit.
+    Returns a bytearray where sieve[i] is 1 if 2*i + 1 is prime, 0 otherwise
+    (even numbers are never stored, halving memory and strike-off work).
     """
-    if n < 2:
-        return False
-    sieve = [True] * (n + 1)
-    sieve[0] = sieve[1] = False
-    for i in range(2, int(sqrt(n)) + 1):
+    size = (limit + 1) // 2
+    # One byte per odd number instead of one list slot (8-byte pointer) each
+    sieve = bytearray([1]) * size
+    if size:
+        sieve[0] = 0
+    for i in range(1, (isqrt(limit) + 1) // 2):
         if sieve[i]:
-            for j in range(i * i, n + 1, i):
-                sieve[j] = False
-    return sieve[n]
+            p = 2 * i + 1
+            start = p * p // 2
+            # Strike off odd multiples with a single C-level slice assignment
+            sieve[start::p] = bytes((size - 1 - start) // p + 1)
+    return sieve
 
-def sieve_of_atkin_single(n):
+def primes_up_to(limit):
     """
-    Test primality of a single number using Sieve of Atkin
+    List of all primes <= limit, read off the sieve without a Python loop
+    """
+    if limit < 2:
+        return []
+    return [2] + list(itertools.compress(range(1, limit + 1, 2),
+                                         eratosthenes_sieve(limit)))
+
+def sieve_of_eratosthenes_single(n):
+    """
+    Test primality of a single number using Sieve of Eratosthenes.
+    Only primes up to sqrt(n) are sieved; n is then trial divided by them.
     """
     if n < 2:
         return False
-    if n in (2, 3):
-        return True
-    sieve = [False] * (n + 1)
-    sieve[2] = sieve[3] = True
-    sqrt_n = int(sqrt(n))
+    for p in primes_up_to(isqrt(n)):
+        if n % p == 0:
+            return n == p
+    return True
+
+def sieve_many(numbers):
+    """
+    Classify many numbers at once with a single full sieve up to max(numbers)
+    (numbers below 2, including negatives, are simply not prime)
+
+    >>> sieve_many([-7, 0, 1, 2, 9, 97])
+    [False, False, False, True, False, True]
+    """
+    numbers = list(numbers)
+    if not numbers:
+        return []
+    sieve = eratosthenes_sieve(max(max(numbers), 1))
+    return [n == 2 or (n > 2 and n % 2 == 1 and bool(sieve[n // 2]))
+            for n in numbers]
+
+def atkin_sieve(limit):
+    """
+    Sieve of Atkin over 0..limit.
+    Returns a list where sieve[i] is True if i is prime.
+    """
+    sieve = [False] * (limit + 1)
+    for p in (2, 3):
+        if p <= limit:
+            sieve[p] = True
+    sqrt_n = isqrt(limit)
+    y_squares = [y * y for y in range(1, sqrt_n + 1)]
     for x in range(1, sqrt_n + 1):
-        for y in range(1, sqrt_n + 1):
-            n1 = 4 * x * x + y * y
-            if n1 <= n and n1 % 12 in (1, 5):
+        # Hoist the x-only terms out of the y loop
+        x2 = x * x
+        fourx2 = x2 << 2
+        threex2 = x2 + (x2 << 1)
+        for y, y2 in enumerate(y_squares, 1):
+            n1 = fourx2 + y2
+            if n1 <= limit and MOD12_1_5[n1 % 12]:
                 sieve[n1] = not sieve[n1]
-            n2 = 3 * x * x + y * y
-            if n2 <= n and n2 % 12 == 7:
+            n2 = threex2 + y2
+            if n2 <= limit and MOD12_7[n2 % 12]:
                 sieve[n2] = not sieve[n2]
-            n3 = 3 * x * x - y * y
-            if x > y and n3 <= n and n3 % 12 == 11:
+            n3 = threex2 - y2
+            if x > y and n3 <= limit and MOD12_11[n3 % 12]:
                 sieve[n3] = not sieve[n3]
     for i in range(5, sqrt_n + 1):
         if sieve[i]:
-            for j in range(i * i, n + 1, i * i):
-                sieve[j] = False
-    return sieve[n]
+            step = i * i
+            sieve[step::step] = [False] * (limit // step)
+    return sieve
+
+def sieve_of_atkin_single(n):
+    """
+    Test primality of a single number using Sieve of Atkin.
+    Only primes up to sqrt(n) are sieved; n is then trial divided by them.
+    """
+    if n < 2:
+        return False
+    if n in (2, 3):
+        return True
+    sieve = atkin_sieve(isqrt(n))
+    for p in itertools.compress(range(len(sieve)), sieve):
+        if n % p == 0:
+            return False
+    return True
+
+def wheel30_sieve(limit):
+    """
+    Sieve of Eratosthenes on the mod-30 wheel over 0..limit.
+    Returns 8 bytearrays, one per residue r in WHEEL30_RESIDUES, where
+    sieve[j][k] is 1 if 30*k + r is prime (2, 3 and 5 are not stored).
+    """
+    sieve = [bytearray([1]) * ((limit - r) // 30 + 1) if limit >= r
+             else bytearray() for r in WHEEL30_RESIDUES]
+    if sieve[0]:
+        sieve[0][0] = 0  # 1 is not prime
+    for k in range(isqrt(limit) // 30 + 1):
+        for j, r in enumerate(WHEEL30_RESIDUES):
+            p = 30 * k + r
+            if p < 7 or p * p > limit or not sieve[j][k]:
+                continue
+            # The odd multiples p*q with q on the wheel and q >= p fall into
+            # one residue class per q mod 30, stepping by p within that class
+            for rq in WHEEL30_RESIDUES:
+                q = p + (rq - p) % 30
+                target = sieve[WHEEL30_INDEX[p * rq % 30]]
+                start = p * q // 30
+                if start < len(target):
+                    target[start::p] = bytes((len(target) - 1 - start) // p + 1)
+    return sieve
+
+def sieve_of_wheel30_single(n):
+    """
+    Test primality of a single number using the wheel-30 Sieve of
+    Eratosthenes. Only primes up to sqrt(n) are sieved; n is then trial
+    divided by them.
+    """
+    if n in (2, 3, 5):
+        return True
+    if n < 2 or n % 30 not in WHEEL30_INDEX:
+        return False
+    sieve = wheel30_sieve(isqrt(n))
+    for r, residue_class in zip(WHEEL30_RESIDUES, sieve):
+        for k in itertools.compress(range(len(residue_class)), residue_class):
+            if n % (30 * k + r) == 0:
+                return False
+    return True
 
 def average_execution_time(func, *args, runs=10):
     """
@@ -96,10 +359,11 @@ def main():
         print("1. Miller-Rabin")
         print("2. Sieve of Eratosthenes")
         print("3. Sieve of Atkin")
-        print("4. Exit")
+        print("4. Wheel-30 Sieve of Eratosthenes")
+        print("5. Exit")
         
-        choice = input("Select algorithm (1-4): ")
-        if choice == '4':
+        choice = input("Select algorithm (1-5): ")
+        if choice == '5':
             print("Exiting program. Goodbye!")
             break
         
@@ -127,5 +391,10 @@ def main():
             print(f"Sieve of Atkin: {'Prime' if result else 'Composite'}")
             print(f"Average Time Taken over {runs} runs: {avg_time:.6f}s")
 
+        elif choice == '4':
+            result, avg_time = average_execution_time(sieve_of_wheel30_single, num, runs=runs)
+            print(f"Wheel-30 Sieve of Eratosthenes: {'Prime' if result else 'Composite'}")
+            print(f"Average Time Taken over {runs} runs: {avg_time:.6f}s")
+
 if __name__ == "__main__":
     main()
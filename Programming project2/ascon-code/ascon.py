@@ -19,6 +19,18 @@ def ascon_hash(message, variant="Ascon-Hash256", hashlength=32):
     hashlength: the requested output bytelength (must be 32 for variant "Ascon-Hash256"; can be arbitrary for Ascon-XOF128, but should be >= 32 for 128-bit security)
     returns a bytes object containing the hash tag
     """
+    return ascon_hash_stream([message], variant, hashlength)
+
+
+def ascon_hash_stream(chunks, variant="Ascon-Hash256", hashlength=32):
+    """
+    Incremental Ascon hash: same result as ascon_hash(b"".join(chunks)),
+    but absorbs the message chunk by chunk so it never has to be in memory
+    as a whole.
+    chunks: an iterable of bytes-like objects of arbitrary lengths
+    variant, hashlength: as for ascon_hash
+    returns a bytes object containing the hash tag
+    """
     versions = {"Ascon-Hash256": 2,
                 "Ascon-XOF128": 3,
                 "Ascon-CXOF128": 4}
@@ -36,14 +48,20 @@ def ascon_hash(message, variant="Ascon-Hash256", hashlength=32):
     ascon_permutation(S, 12)
     if debug: printstate(S, "initialization:")
 
-    # Message Processing (Absorbing)
-    m_padding = to_bytes([0x01]) + zero_bytes(rate - (len(message) % rate) - 1)
-    m_padded = message + m_padding
-
-    # message blocks 0,...,n
-    for block in range(0, len(m_padded), rate):
-        S[0] ^= bytes_to_int(m_padded[block:block+rate])
-        ascon_permutation(S, 12)
+    # Message Processing (Absorbing) - full blocks as they arrive, keeping
+    # any partial block until the next chunk (or the final padding)
+    pending = b""
+    for chunk in chunks:
+        data = pending + bytes(chunk)
+        full = len(data) - (len(data) % rate)
+        for block in range(0, full, rate):
+            S[0] ^= bytes_to_int(data[block:block+rate])
+            ascon_permutation(S, 12)
+        pending = data[full:]
+
+    # last (padded) block
+    S[0] ^= bytes_to_int(pending + to_bytes([0x01]) + zero_bytes(rate - len(pending) - 1))
+    ascon_permutation(S, 12)
     if debug: printstate(S, "process message:")
 
     # Finalization (Squeezing)
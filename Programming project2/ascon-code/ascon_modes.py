@@ -1,15 +1,31 @@
 #!/usr/bin/env python3
 
-import importlib.util
+import hmac
 import sys
 
-# Dynamically import the original Ascon implementation
-spec = importlib.util.spec_from_file_location("ascon", "ascon.py")
-ascon_module = importlib.util.module_from_spec(spec)
-sys.modules["ascon"] = ascon_module
-spec.loader.exec_module(ascon_module)
+try:
+    import ascon
+except ImportError:
+    # Not importable from sys.path: load the original Ascon implementation
+    # from the file next to this module
+    import importlib.util
+    import os
+    spec = importlib.util.spec_from_file_location(
+        "ascon", os.path.join(os.path.dirname(os.path.abspath(__file__)), "ascon.py"))
+    ascon_module = importlib.util.module_from_spec(spec)
+    sys.modules["ascon"] = ascon_module
+    spec.loader.exec_module(ascon_module)
+
+from ascon import get_random_bytes, zero_bytes, bytes_to_hex, ascon_encrypt
+
+BLOCK_SIZE = 16
+ZERO16 = zero_bytes(BLOCK_SIZE)
+
+
+def _xor_bytes(a, b):
+    """XOR two equal-length byte strings as one big integer (C-level loop)"""
+    return (int.from_bytes(a, 'little') ^ int.from_bytes(b, 'little')).to_bytes(len(a), 'little')
 
-from ascon import get_random_bytes, zero_bytes, bytes_to_hex
 
 class AsconModes:
     @staticmethod
@@ -23,9 +39,13 @@ class AsconModes:
     def unpad_data(padded_data):
         """Remove PKCS7 padding from the data"""
         padding_length = padded_data[-1]
-        if padding_length == 0 or padding_length > 16:
-            raise ValueError("Invalid padding")
-        if padded_data[-padding_length:] != bytes([padding_length] * padding_length):
+        # Check range and pad bytes together, with a constant-time compare,
+        # so timing does not reveal which check failed (padding oracle)
+        in_range = 0 < padding_length <= BLOCK_SIZE
+        checked_length = padding_length if in_range else BLOCK_SIZE
+        pad_ok = hmac.compare_digest(padded_data[-checked_length:],
+                                     bytes([padding_length]) * checked_length)
+        if not (pad_ok and in_range):
             raise ValueError("Invalid padding")
         return padded_data[:-padding_length]
 
@@ -37,21 +57,22 @@ class AsconModes:
         if len(iv) != 16:
             raise ValueError("IV must be 16 bytes")
 
-        block_size = 16
-        padded_plaintext = AsconModes.pad_data(plaintext, block_size)
-        ciphertext = b''
+        padded_plaintext = AsconModes.pad_data(plaintext, BLOCK_SIZE)
+        out = bytearray(len(padded_plaintext))
         previous_block = iv
+        # Bind the cipher to a local once instead of a global lookup per block
+        encrypt = ascon_encrypt
 
-        for i in range(0, len(padded_plaintext), block_size):
-            block = padded_plaintext[i:i + block_size]
+        for i in range(0, len(padded_plaintext), BLOCK_SIZE):
+            block = padded_plaintext[i:i + BLOCK_SIZE]
             # XOR with previous ciphertext block or IV
-            xored = bytes(a ^ b for a, b in zip(block, previous_block))
+            xored = _xor_bytes(block, previous_block)
             # Encrypt block using Ascon
-            encrypted = ascon_module.ascon_encrypt(key, previous_block, b'', xored)[:block_size]
-            ciphertext += encrypted
+            encrypted = encrypt(key, previous_block, b'', xored)[:BLOCK_SIZE]
+            out[i:i + BLOCK_SIZE] = encrypted
             previous_block = encrypted
 
-        return ciphertext
+        return bytes(out)
 
     @staticmethod
     def cbc_decrypt(key, iv, ciphertext):
@@ -63,24 +84,33 @@ class AsconModes:
         if len(ciphertext) % 16 != 0:
             raise ValueError("Ciphertext length must be multiple of 16")
 
-        block_size = 16
-        plaintext = b''
-        previous_block = iv
-
-        for i in range(0, len(ciphertext), block_size):
-            current_block = ciphertext[i:i + block_size]
+        # Every block is chained to the previous ciphertext block (or the IV),
+        # all of which are known up front
+        previous_blocks = iv + ciphertext[:-BLOCK_SIZE]
+        keystream = bytearray(len(ciphertext))
+        encrypt = ascon_encrypt
+        for i in range(0, len(ciphertext), BLOCK_SIZE):
             # Use Ascon to generate keystream
-            keystream = ascon_module.ascon_encrypt(key, previous_block, b'', zero_bytes(block_size))[:block_size]
-            # XOR keystream with current block
-            decrypted = bytes(a ^ b for a, b in zip(current_block, keystream))
-            # XOR with previous block or IV
-            plaintext_block = bytes(a ^ b for a, b in zip(decrypted, previous_block))
-            plaintext += plaintext_block
-            previous_block = current_block
+            keystream[i:i + BLOCK_SIZE] = encrypt(
+                key, previous_blocks[i:i + BLOCK_SIZE], b'', ZERO16)[:BLOCK_SIZE]
+
+        # XOR keystream and previous blocks into the whole ciphertext at once
+        plaintext = _xor_bytes(_xor_bytes(ciphertext, keystream), previous_blocks[:len(ciphertext)])
 
         # Remove padding
         return AsconModes.unpad_data(plaintext)
 
+    @staticmethod
+    def _ofb_keystream(key, iv, length):
+        """Generate the OFB keystream for `length` bytes (a multiple of 16)"""
+        keystream = bytearray(length)
+        previous_block = iv
+        encrypt = ascon_encrypt
+        for i in range(0, length, BLOCK_SIZE):
+            previous_block = encrypt(key, previous_block, b'', ZERO16)[:BLOCK_SIZE]
+            keystream[i:i + BLOCK_SIZE] = previous_block
+        return keystream
+
     @staticmethod
     def ofb_encrypt(key, iv, plaintext):
         """Encrypt using Ascon in OFB mode"""
@@ -89,21 +119,11 @@ class AsconModes:
         if len(iv) != 16:
             raise ValueError("IV must be 16 bytes")
 
-        block_size = 16
-        padded_plaintext = AsconModes.pad_data(plaintext, block_size)
-        ciphertext = b''
-        previous_block = iv
-
-        for i in range(0, len(padded_plaintext), block_size):
-            # Generate keystream using Ascon
-            keystream = ascon_module.ascon_encrypt(key, previous_block, b'', zero_bytes(block_size))[:block_size]
-            # XOR with plaintext block
-            block = padded_plaintext[i:i + block_size]
-            encrypted_block = bytes(a ^ b for a, b in zip(block, keystream))
-            ciphertext += encrypted_block
-            previous_block = keystream
-
-        return ciphertext
+        padded_plaintext = AsconModes.pad_data(plaintext, BLOCK_SIZE)
+        # The keystream does not depend on the plaintext: generate it first,
+        # then XOR the whole message in a single pass
+        keystream = AsconModes._ofb_keystream(key, iv, len(padded_plaintext))
+        return _xor_bytes(padded_plaintext, keystream)
 
     @staticmethod
     def ofb_decrypt(key, iv, ciphertext):
@@ -115,18 +135,6 @@ class AsconModes:
         if len(ciphertext) % 16 != 0:
             raise ValueError("Ciphertext length must be multiple of 16")
 
-        block_size = 16
-        plaintext = b''
-        previous_block = iv
-
-        for i in range(0, len(ciphertext), block_size):
-            # Generate keystream using Ascon
-            keystream = ascon_module.ascon_encrypt(key, previous_block, b'', zero_bytes(block_size))[:block_size]
-            # XOR with ciphertext block
-            block = ciphertext[i:i + block_size]
-            decrypted_block = bytes(a ^ b for a, b in zip(block, keystream))
-            plaintext += decrypted_block
-            previous_block = keystream
-
+        keystream = AsconModes._ofb_keystream(key, iv, len(ciphertext))
         # Remove padding
-        return AsconModes.unpad_data(plaintext)
\ No newline at end of file
+        return AsconModes.unpad_data(_xor_bytes(ciphertext, keystream))
\ No newline at end of file
@@ -2,8 +2,14 @@ import os
 import tempfile
 import unittest
 from datetime import datetime
+from ascon import ascon_hash, ascon_hash_stream
 from changes import create_document_signature, verify_document_signature, SignatureError
 
+# Random content for the large-file test, generated once per process
+# (each parallel test worker makes its own) rather than once per test run
+LARGE_FILE_SIZE = 1024 * 100  # 100KB
+LARGE_FILE_CONTENT = os.urandom(LARGE_FILE_SIZE)
+
 class TestAsconDocumentIntegrity(unittest.TestCase):
     def setUp(self):
         """Set up test environment before each test"""
@@ -70,8 +76,8 @@ class TestAsconDocumentIntegrity(unittest.TestCase):
         """Test integrity verification with larger files"""
         print("\nTesting large file integrity...")
         # Create a moderate-sized document (100KB)
-        chunk_size = 1024 * 100  # 100KB
-        large_content = os.urandom(chunk_size)
+        chunk_size = LARGE_FILE_SIZE
+        large_content = LARGE_FILE_CONTENT
         filepath = self.create_test_file(large_content, "large_test.doc")
         
         try:
@@ -183,6 +189,21 @@ class TestAsconDocumentIntegrity(unittest.TestCase):
         self.assertEqual(author, self.author_id)
         print("Binary file test successful")
 
+    def test_streaming_hash_matches_one_shot(self):
+        """Test that hashing in chunks gives the same digest as hashing at once"""
+        print("\nTesting streaming hash...")
+        message = bytes([i % 256 for i in range(100)])
+
+        # chunk sizes below, at, between and above the 8-byte Ascon rate
+        for chunk_size in (1, 3, 7, 8, 9, 16, 64):
+            chunks = [message[i:i+chunk_size] for i in range(0, len(message), chunk_size)]
+            self.assertEqual(ascon_hash_stream(chunks), ascon_hash(b"".join(chunks)))
+
+        # empty input, with and without an empty chunk
+        self.assertEqual(ascon_hash_stream([]), ascon_hash(b""))
+        self.assertEqual(ascon_hash_stream([b""]), ascon_hash(b""))
+        print("Streaming hash test successful")
+
 def run_ascon_integrity_tests():
     """Run the Ascon integrity test suite and print results"""
     print("Starting Ascon Document Integrity Test Suite")
@@ -1,12 +1,30 @@
 import os
 from datetime import datetime
 import struct
-from ascon import ascon_hash, ascon_encrypt, ascon_decrypt, get_random_bytes
+from ascon import ascon_hash_stream, ascon_encrypt, ascon_decrypt, get_random_bytes
+
+# Documents are hashed in chunks of this size instead of being read whole
+HASH_CHUNK_SIZE = 64 * 1024
 
 class SignatureError(Exception):
     """Custom exception for signature-related errors"""
     pass
 
+def read_chunks(f, length=None, chunk_size=HASH_CHUNK_SIZE):
+    """
+    Yield the contents of an open file in chunks of at most chunk_size bytes,
+    stopping after `length` bytes if given (otherwise at end of file)
+    """
+    remaining = length
+    while remaining is None or remaining > 0:
+        size = chunk_size if remaining is None else min(chunk_size, remaining)
+        chunk = f.read(size)
+        if not chunk:
+            break
+        if remaining is not None:
+            remaining -= len(chunk)
+        yield chunk
+
 def create_document_signature(filepath, author_key, author_id):
     """
     Creates and appends a digital signature to a document
@@ -26,10 +44,6 @@ def create_document_signature(filepath, author_key, author_id):
         raise ValueError("Author key must be exactly 16 bytes")
         
     try:
-        # Read the document content
-        with open(filepath, 'rb') as f:
-            document_content = f.read()
-        
         # Create metadata
         timestamp = datetime.now().isoformat().encode('utf-8')
         author_id_bytes = author_id.encode('utf-8')
@@ -38,8 +52,9 @@ def create_document_signature(filepath, author_key, author_id):
         metadata = struct.pack('<H', len(timestamp)) + timestamp + \
                   struct.pack('<H', len(author_id_bytes)) + author_id_bytes
         
-        # Generate document hash
-        doc_hash = ascon_hash(document_content)
+        # Generate document hash, streaming the file through the sponge
+        with open(filepath, 'rb') as f:
+            doc_hash = ascon_hash_stream(read_chunks(f))
         
         # Combine metadata and hash
         signature_data = metadata + doc_hash
@@ -85,32 +100,37 @@ def verify_document_signature(filepath, author_key):
     """
     MAGIC = b"ASCON_SIG"
     MIN_SIG_SIZE = len(MAGIC) + 8 + 16  # Magic + size + nonce
+    # Largest possible signature block: both metadata fields at their
+    # 16-bit length limit, plus the 32-byte hash and the 16-byte tag
+    MAX_SIG_SIZE = MIN_SIG_SIZE + 2 * (2 + 0xFFFF) + 32 + 16
     
     try:
+        file_size = os.path.getsize(filepath)
+        if file_size < MIN_SIG_SIZE:
+            raise SignatureError("File too small to contain a valid signature")
+        
         with open(filepath, 'rb') as f:
-            # Read the entire file
-            content = f.read()
-            
-            if len(content) < MIN_SIG_SIZE:
-                raise SignatureError("File too small to contain a valid signature")
+            # The signature is appended at the end, so only the tail of the
+            # file can contain it - read just that part
+            tail_start = max(0, file_size - MAX_SIG_SIZE)
+            f.seek(tail_start)
+            tail = f.read()
             
             # Look for magic number from the end
-            sig_start = content.rfind(MAGIC)
-            if sig_start == -1:
+            sig_start_in_tail = tail.rfind(MAGIC)
+            if sig_start_in_tail == -1:
                 raise SignatureError("No valid signature found")
+            sig_start = tail_start + sig_start_in_tail
             
             # Extract signature components
-            pos = sig_start + len(MAGIC)
-            sig_len = struct.unpack('<Q', content[pos:pos+8])[0]
+            pos = sig_start_in_tail + len(MAGIC)
+            sig_len = struct.unpack('<Q', tail[pos:pos+8])[0]
             pos += 8
             
-            nonce = content[pos:pos+16]
+            nonce = tail[pos:pos+16]
             pos += 16
             
-            encrypted_signature = content[pos:pos+sig_len]
-            
-            # Extract original document content
-            document_content = content[:sig_start]
+            encrypted_signature = tail[pos:pos+sig_len]
             
             # Decrypt signature
             signature_block = ascon_decrypt(
@@ -137,8 +157,10 @@ def verify_document_signature(filepath, author_key):
             
             stored_hash = signature_block[pos:pos+32]
             
-            # Verify document hash
-            current_hash = ascon_hash(document_content)
+            # Verify document hash over the bytes before the signature,
+            # re-reading them in chunks instead of slicing a copy
+            f.seek(0)
+            current_hash = ascon_hash_stream(read_chunks(f, sig_start))
             
             if current_hash != stored_hash:
                 raise SignatureError("Document content has been modified")
@@ -0,0 +1,228 @@
+/*
+ * Optional native GIFT-128 (bit-sliced) core for gift128bitsliced.py.
+ *
+ * Same state layout and round function as Gift128BitSliced: four 32 bit
+ * words loaded big-endian from the block, the sub cells / perm bits / add
+ * round key steps from the GIFT-128 bit sliced paper, and round keys as
+ * (U, V) pairs with the round constant 0x80000000 | rc.
+ *
+ * Build (from this directory):
+ *     cc -O3 -march=native -shared -fPIC -o _gift128.so _gift128.c
+ * (-march=native lets the multi-block loops below use AVX2 / AVX-512; drop
+ * it for a library that has to run on other machines)
+ *
+ * gift128bitsliced.py loads _gift128.so through ctypes when it is present
+ * and falls back to pure Python otherwise.
+ */
+
+#include <stddef.h>
+#include <stdint.h>
+
+#define GIFT128_ROUNDS 40
+
+static const uint8_t round_constants[GIFT128_ROUNDS] = {
+    0x01, 0x03, 0x07, 0x0F, 0x1F, 0x3E, 0x3D, 0x3B,
+    0x37, 0x2F, 0x1E, 0x3C, 0x39, 0x33, 0x27, 0x0E,
+    0x1D, 0x3A, 0x35, 0x2B, 0x16, 0x2C, 0x18, 0x30,
+    0x21, 0x02, 0x05, 0x0B, 0x17, 0x2E, 0x1C, 0x38,
+    0x31, 0x23, 0x06, 0x0D, 0x1B, 0x36, 0x2D, 0x1A
+};
+
+/* bit 4 * i + j of a cell moves to bit i + 8 * bj (bj = _bit_positions) */
+#define ROWPERM(S, b0, b1, b2, b3) do {                        \
+        uint32_t t_ = 0;                                       \
+        for (int i_ = 0; i_ < 8; i_++) {                       \
+            t_ |= ((S >> (4 * i_ + 0)) & 1u) << (i_ + 8 * b0); \
+            t_ |= ((S >> (4 * i_ + 1)) & 1u) << (i_ + 8 * b1); \
+            t_ |= ((S >> (4 * i_ + 2)) & 1u) << (i_ + 8 * b2); \
+            t_ |= ((S >> (4 * i_ + 3)) & 1u) << (i_ + 8 * b3); \
+        }                                                      \
+        S = t_;                                                \
+    } while (0)
+
+static inline uint32_t load32(const uint8_t *p)
+{
+    return (uint32_t)p[0] << 24 | (uint32_t)p[1] << 16
+        | (uint32_t)p[2] << 8 | (uint32_t)p[3];
+}
+
+static inline void store32(uint8_t *p, uint32_t v)
+{
+    p[0] = (uint8_t)(v >> 24);
+    p[1] = (uint8_t)(v >> 16);
+    p[2] = (uint8_t)(v >> 8);
+    p[3] = (uint8_t)v;
+}
+
+/* Expand a 16 byte key into 40 (U, V) round key pairs. */
+void gift128_key_schedule(const uint8_t key[16], uint32_t rk[2 * GIFT128_ROUNDS])
+{
+    uint16_t w[8];
+    for (int i = 0; i < 8; i++)
+        w[i] = (uint16_t)(key[2 * i] << 8 | key[2 * i + 1]);
+
+    for (int r = 0; r < GIFT128_ROUNDS; r++) {
+        rk[2 * r] = (uint32_t)w[2] << 16 | w[3];
+        rk[2 * r + 1] = (uint32_t)w[6] << 16 | w[7];
+
+        /* w6 >>> 2 and w7 >>> 12, then shift the key words along by two */
+        uint16_t t6 = (uint16_t)(w[6] >> 2 | w[6] << 14);
+        uint16_t t7 = (uint16_t)(w[7] >> 12 | w[7] << 4);
+        for (int i = 7; i > 1; i--)
+            w[i] = w[i - 2];
+        w[1] = t7;
+        w[0] = t6;
+    }
+}
+
+static void encrypt_one(const uint32_t *rk, const uint8_t in[16], uint8_t out[16])
+{
+    uint32_t s0 = load32(in), s1 = load32(in + 4);
+    uint32_t s2 = load32(in + 8), s3 = load32(in + 12);
+
+    for (int r = 0; r < GIFT128_ROUNDS; r++) {
+        /* sub cells */
+        s1 ^= s0 & s2;
+        s0 ^= s1 & s3;
+        s2 ^= s0 | s1;
+        s3 ^= s2;
+        s1 ^= s3;
+        s3 = ~s3;
+        s2 ^= s0 & s1;
+        uint32_t t = s0;
+        s0 = s3;
+        s3 = t;
+
+        /* perm bits */
+        ROWPERM(s0, 0, 3, 2, 1);
+        ROWPERM(s1, 1, 0, 3, 2);
+        ROWPERM(s2, 2, 1, 0, 3);
+        ROWPERM(s3, 3, 2, 1, 0);
+
+        /* add round key and constant */
+        s2 ^= rk[2 * r];
+        s1 ^= rk[2 * r + 1];
+        s3 ^= 0x80000000u | round_constants[r];
+    }
+
+    store32(out, s0);
+    store32(out + 4, s1);
+    store32(out + 8, s2);
+    store32(out + 12, s3);
+}
+
+/* Encrypt one block under a 16 byte key. */
+void gift128_encrypt(const uint8_t key[16], const uint8_t in[16], uint8_t out[16])
+{
+    uint32_t rk[2 * GIFT128_ROUNDS];
+    gift128_key_schedule(key, rk);
+    encrypt_one(rk, in, out);
+}
+
+/*
+ * Multi-block core: GIFT128_LANES blocks are kept as a structure of arrays
+ * (word i of every block side by side) and every round step is a loop over
+ * the lanes. The lanes are independent and the loop bodies are branch-free,
+ * so with -O3 (plus -march=native) the compiler turns each step into a few
+ * SIMD instructions over all lanes at once.
+ *
+ * GFNI's GF2P8AFFINEQB does not help here: it applies an affine map over
+ * GF(2), and the GIFT S-box is not affine. The bit-sliced S-box (sub cells)
+ * is already a handful of AND/OR/XOR per word, which vectorizes directly.
+ */
+#define GIFT128_LANES 16
+
+static void encrypt_lanes(const uint32_t *rk, const uint8_t *in, uint8_t *out,
+                          size_t nblocks)
+{
+    uint32_t s0[GIFT128_LANES], s1[GIFT128_LANES];
+    uint32_t s2[GIFT128_LANES], s3[GIFT128_LANES];
+
+    /* unused lanes just repeat block 0 and are never stored */
+    for (size_t l = 0; l < GIFT128_LANES; l++) {
+        const uint8_t *p = in + 16 * (l < nblocks ? l : 0);
+        s0[l] = load32(p);
+        s1[l] = load32(p + 4);
+        s2[l] = load32(p + 8);
+        s3[l] = load32(p + 12);
+    }
+
+    for (int r = 0; r < GIFT128_ROUNDS; r++) {
+        const uint32_t u = rk[2 * r], v = rk[2 * r + 1];
+        const uint32_t c = 0x80000000u | round_constants[r];
+
+        for (size_t l = 0; l < GIFT128_LANES; l++) {
+            uint32_t a = s0[l], b = s1[l], d = s2[l], e = s3[l];
+
+            /* sub cells */
+            b ^= a & d;
+            a ^= b & e;
+            d ^= a | b;
+            e ^= d;
+            b ^= e;
+            e = ~e;
+            d ^= a & b;
+
+            /* perm bits (with the s0 / s3 swap folded in) */
+            ROWPERM(e, 0, 3, 2, 1);
+            ROWPERM(b, 1, 0, 3, 2);
+            ROWPERM(d, 2, 1, 0, 3);
+            ROWPERM(a, 3, 2, 1, 0);
+
+            /* add round key and constant */
+            s0[l] = e;
+            s1[l] = b ^ v;
+            s2[l] = d ^ u;
+            s3[l] = a ^ c;
+        }
+    }
+
+    for (size_t l = 0; l < nblocks; l++) {
+        uint8_t *p = out + 16 * l;
+        store32(p, s0[l]);
+        store32(p + 4, s1[l]);
+        store32(p + 8, s2[l]);
+        store32(p + 12, s3[l]);
+    }
+}
+
+/* Encrypt nblocks independent 16 byte blocks under an expanded key. */
+void gift128_encrypt_blocks(const uint32_t rk[2 * GIFT128_ROUNDS],
+                            const uint8_t *in, uint8_t *out, size_t nblocks)
+{
+    if (nblocks == 1) {
+        encrypt_one(rk, in, out);
+        return;
+    }
+    for (size_t i = 0; i < nblocks; i += GIFT128_LANES) {
+        size_t n = nblocks - i < GIFT128_LANES ? nblocks - i : GIFT128_LANES;
+        encrypt_lanes(rk, in + 16 * i, out + 16 * i, n);
+    }
+}
+
+/*
+ * CTR keystream: encrypt counter, counter + 1, ... (128 bit big-endian,
+ * wrapping mod 2^128) for nblocks blocks.
+ */
+void gift128_encrypt_ctr_batch(const uint32_t rk[2 * GIFT128_ROUNDS],
+                               const uint8_t counter[16], uint8_t *out,
+                               size_t nblocks)
+{
+    uint8_t blocks[16 * GIFT128_LANES];
+    uint8_t block[16];
+    for (int i = 0; i < 16; i++)
+        block[i] = counter[i];
+
+    for (size_t done = 0; done < nblocks; done += GIFT128_LANES) {
+        size_t n = nblocks - done < GIFT128_LANES ? nblocks - done : GIFT128_LANES;
+
+        /* lay the next n counter values out as blocks */
+        for (size_t l = 0; l < n; l++) {
+            for (int i = 0; i < 16; i++)
+                blocks[16 * l + i] = block[i];
+            for (int i = 15; i >= 0 && ++block[i] == 0; i--)
+                ;
+        }
+        encrypt_lanes(rk, blocks, out + 16 * done, n);
+    }
+}
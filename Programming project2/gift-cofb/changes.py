@@ -1,20 +1,91 @@
+import functools
+import mmap
 import os
 from datetime import datetime
 import struct
-from gift_cofb import GiftCofb, string_to_list, list_to_string
+from gift_cofb import GiftCofb, string_to_list
+from utils import bytes_to_block_list, bytes_to_nibbles, hex_to_decimal, iter_block_list, nibbles_to_bytes
+
+# Signature formats per backend: (magic number, nonce size in bytes)
+SIGNATURE_FORMATS = {
+    'gift_cofb': (b"GIFT_SIG", 16),
+    'aes_ni': (b"AES_SIG\x01", 12),
+}
 
 class GiftSignatureError(Exception):
     """Custom exception for GIFT-COFB signature-related errors"""
     pass
 
-def create_gift_document_signature(filepath, author_key_hex, author_id):
+def _aes_gcm(key, nonce, tag=None):
+    """
+    Builds an AES-GCM cipher through the optional `cryptography` package,
+    which runs on OpenSSL (AES-NI + PCLMUL GHASH where the CPU has them).
+    Imported lazily so the GIFT-COFB backend needs only the standard library.
+    """
+    try:
+        from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+    except ImportError:
+        raise GiftSignatureError("The 'aes_ni' backend requires the 'cryptography' package")
+    return Cipher(algorithms.AES(key), modes.GCM(nonce, tag))
+
+@functools.lru_cache(maxsize=64)
+def _signing_context(author_key_hex):
+    """
+    Parses and expands an author key once, so repeated signing and
+    verification with the same key skip all key-derived setup
+    
+    Returns:
+        Tuple of (key nibbles, GIFT-128 key schedule)
+    """
+    key_list = tuple(string_to_list(author_key_hex))
+    schedule = GiftCofb().cipher.expand_key(hex_to_decimal(key_list))
+    return key_list, schedule
+
+def _find_signature(mm, magic, nonce_size, max_sig_window):
+    """
+    Locates the start of the last signature in a mapped file, using the
+    footer (signature length + magic number) written at the very end, or
+    for signatures written before the footer existed, by searching the last
+    max_sig_window bytes for the magic number
+    
+    Returns:
+        Offset of the signature's magic number, or -1 if none is found
+    """
+    footer_size = 8 + len(magic)
+    header_size = len(magic) + 8 + nonce_size
+    search_end = len(mm)
+    
+    if len(mm) >= footer_size and mm[-len(magic):] == magic:
+        # Never let the fallback search match the footer's own magic number
+        search_end = len(mm) - footer_size
+        if len(mm) >= footer_size + header_size + 16:
+            sig_total, = struct.unpack_from('<Q', mm, search_end)
+            sig_start = search_end - sig_total
+            # Only trust the footer if it points at a header whose length agrees
+            if sig_start >= 0 and sig_total >= header_size + 16 and \
+                    mm[sig_start:sig_start + len(magic)] == magic:
+                sig_len, = struct.unpack_from('<Q', mm, sig_start + len(magic))
+                if header_size + sig_len + 16 == sig_total:
+                    return sig_start
+    
+    return mm.rfind(magic, max(0, len(mm) - max_sig_window), search_end)
+
+def _check_backend(backend):
+    """Raises ValueError for an unknown signature backend"""
+    if backend not in SIGNATURE_FORMATS:
+        raise ValueError(f"Unknown signature backend: {backend!r} "
+                         f"(expected one of {', '.join(SIGNATURE_FORMATS)})")
+
+def create_gift_document_signature(filepath, author_key_hex, author_id, backend='gift_cofb'):
     """
     Creates and appends a digital signature to a document using GIFT-COFB
+    (or AES-GCM with backend='aes_ni')
     
     Args:
         filepath: Path to the document to sign
         author_key_hex: 32-character hex string (16 bytes) known only to the author
         author_id: String identifying the author
+        backend: 'gift_cofb' (pure Python) or 'aes_ni' (AES-GCM via `cryptography`)
     
     Returns:
         Tuple of (signature_bytes, signature_length)
@@ -24,11 +95,11 @@ def create_gift_document_signature(filepath, author_key_hex, author_id):
     
     if len(author_key_hex) != 32:
         raise ValueError("Author key must be exactly 32 hex characters (16 bytes)")
+    
+    _check_backend(backend)
+    MAGIC, NONCE_SIZE = SIGNATURE_FORMATS[backend]
         
     try:
-        # Initialize GIFT-COFB
-        gift_cofb = GiftCofb()
-        
         # Read the document content
         with open(filepath, 'rb') as f:
             document_content = f.read()
@@ -41,45 +112,28 @@ def create_gift_document_signature(filepath, author_key_hex, author_id):
         metadata = struct.pack('<H', len(timestamp)) + timestamp + \
                   struct.pack('<H', len(author_id_bytes)) + author_id_bytes
         
-        # Convert document content to hex string for GIFT-COFB input
-        doc_hex = document_content.hex()
-        doc_blocks = [string_to_list(doc_hex[i:i+32]) for i in range(0, len(doc_hex), 32)]
-        if not doc_blocks:
-            doc_blocks = [[]]
-            
-        # Convert metadata to hex
-        metadata_hex = metadata.hex()
-        metadata_blocks = [string_to_list(metadata_hex[i:i+32]) for i in range(0, len(metadata_hex), 32)]
-        if not metadata_blocks:
-            metadata_blocks = [[]]
-            
-        # Convert key from hex string to list format
-        key_list = string_to_list(author_key_hex)
-        
-        # Generate nonce (use first 32 chars of document content hash as nonce)
-        nonce_hex = doc_hex[:32].ljust(32, '0')
-        nonce_list = string_to_list(nonce_hex)
-        
-        # Encrypt metadata using GIFT-COFB
-        encrypted_blocks, tag = gift_cofb.encrypt(
-            metadata_blocks,
-            key_list,
-            doc_blocks,  # Use document content as associated data
-            nonce_list
-        )
-        
-        # Convert encrypted blocks and tag to bytes
-        encrypted_data = bytes.fromhex(list_to_string(encrypted_blocks))
-        tag_bytes = bytes.fromhex(list_to_string([tag]))
+        if backend == 'aes_ni':
+            # Encrypt metadata using AES-GCM with the document as associated data
+            nonce = os.urandom(NONCE_SIZE)
+            encryptor = _aes_gcm(bytes.fromhex(author_key_hex), nonce).encryptor()
+            encryptor.authenticate_additional_data(document_content)
+            encrypted_data = encryptor.update(metadata) + encryptor.finalize()
+            tag_bytes = encryptor.tag
+        else:
+            encrypted_data, nonce, tag_bytes = _gift_cofb_seal(
+                author_key_hex, document_content, metadata)
         
         # Create final signature block with magic number
-        MAGIC = b"GIFT_SIG"
         final_signature = MAGIC + \
                          struct.pack('<Q', len(encrypted_data)) + \
-                         bytes.fromhex(nonce_hex) + \
+                         nonce + \
                          encrypted_data + \
                          tag_bytes
         
+        # End with a fixed-size footer (signature length + magic number) so
+        # the verifier can find the signature from the end of the file
+        final_signature += struct.pack('<Q', len(final_signature)) + MAGIC
+        
         # Append to document
         with open(filepath, 'ab') as f:
             f.write(final_signature)
@@ -89,87 +143,108 @@ def create_gift_document_signature(filepath, author_key_hex, author_id):
     except Exception as e:
         raise GiftSignatureError(f"Failed to create signature: {str(e)}")
 
-def verify_gift_document_signature(filepath, author_key_hex):
+def _gift_cofb_seal(author_key_hex, document_content, metadata):
+    """
+    Encrypts the metadata under GIFT-COFB with the document as associated data
+    
+    Returns:
+        Tuple of (encrypted_data, nonce, tag_bytes)
+    """
+    # Initialize GIFT-COFB
+    gift_cofb = GiftCofb()
+    
+    # Stream document content into GIFT-COFB blocks directly from bytes
+    doc_blocks = iter_block_list(document_content)
+        
+    # Split metadata the same way
+    metadata_blocks = bytes_to_block_list(metadata)
+    if not metadata_blocks:
+        metadata_blocks = [[]]
+        
+    # Key nibbles and expanded schedule, cached per author key
+    key_list, schedule = _signing_context(author_key_hex)
+    
+    # Generate nonce (use first 16 bytes of document content as nonce)
+    nonce = document_content[:16].ljust(16, b'\x00')
+    nonce_list = bytes_to_block_list(nonce)[0]
+    
+    # Encrypt metadata using GIFT-COFB
+    encrypted_blocks, tag = gift_cofb.encrypt(
+        metadata_blocks,
+        key_list,
+        doc_blocks,  # Use document content as associated data
+        nonce_list,
+        schedule
+    )
+    
+    # Convert encrypted blocks and tag to bytes
+    encrypted_data = nibbles_to_bytes(encrypted_blocks)
+    tag_bytes = nibbles_to_bytes(tag)
+    
+    return encrypted_data, nonce, tag_bytes
+
+def verify_gift_document_signature(filepath, author_key_hex, backend='gift_cofb'):
     """
     Verifies the integrity and authorship of a signed document using GIFT-COFB
+    (or AES-GCM with backend='aes_ni')
     
     Args:
         filepath: Path to the signed document
         author_key_hex: 32-character hex string (16 bytes) of the purported author
+        backend: Backend the document was signed with ('gift_cofb' or 'aes_ni')
     
     Returns:
         Tuple of (is_valid, author_id, timestamp) if verification succeeds
         Raises GiftSignatureError if verification fails
     """
-    MAGIC = b"GIFT_SIG"
-    MIN_SIG_SIZE = len(MAGIC) + 8 + 16  # Magic + size + nonce
+    _check_backend(backend)
+    MAGIC, NONCE_SIZE = SIGNATURE_FORMATS[backend]
+    MIN_SIG_SIZE = len(MAGIC) + 8 + NONCE_SIZE  # Magic + size + nonce
+    # Metadata is two length-prefixed fields, padded to a whole block
+    MAX_ENCRYPTED_LEN = 2 * (2 + 0xFFFF) + 16
+    MAX_SIG_WINDOW = MIN_SIG_SIZE + MAX_ENCRYPTED_LEN + 16  # ... + tag
     
     try:
-        # Initialize GIFT-COFB
-        gift_cofb = GiftCofb()
-        
         with open(filepath, 'rb') as f:
-            # Read the entire file
-            content = f.read()
-            
-            if len(content) < MIN_SIG_SIZE:
+            if os.path.getsize(filepath) < MIN_SIG_SIZE:
                 raise GiftSignatureError("File too small to contain a valid signature")
             
-            # Look for magic number from the end
-            sig_start = content.rfind(MAGIC)
-            if sig_start == -1:
-                raise GiftSignatureError("No valid signature found")
-            
-            # Extract signature components
-            pos = sig_start + len(MAGIC)
-            sig_len = struct.unpack('<Q', content[pos:pos+8])[0]
-            pos += 8
-            
-            nonce = content[pos:pos+16]
-            pos += 16
-            
-            encrypted_data = content[pos:pos+sig_len]
-            tag = content[pos+sig_len:pos+sig_len+16]
-            
-            # Extract original document content
-            document_content = content[:sig_start]
-            
-            # Convert to GIFT-COFB format
-            key_list = string_to_list(author_key_hex)
-            nonce_list = string_to_list(nonce.hex())
-            doc_hex = document_content.hex()
-            doc_blocks = [string_to_list(doc_hex[i:i+32]) for i in range(0, len(doc_hex), 32)]
-            if not doc_blocks:
-                doc_blocks = [[]]
-            
-            encrypted_hex = encrypted_data.hex()
-            encrypted_blocks = [string_to_list(encrypted_hex[i:i+32]) for i in range(0, len(encrypted_hex), 32)]
-            if not encrypted_blocks:
-                encrypted_blocks = [[]]
-            
-            # Decrypt and verify using GIFT-COFB
-            decrypted_blocks = gift_cofb.verify(
-                encrypted_blocks,
-                key_list,
-                doc_blocks,  # Document content as associated data
-                nonce_list,
-                string_to_list(tag.hex())
-            )
-            
-            if decrypted_blocks == [-1]:
-                raise GiftSignatureError("Signature verification failed")
+            # Map the file instead of reading it, so the document body is
+            # only paged in as GIFT-COFB consumes it
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                # The signature is appended at the end, so it is found from
+                # the footer (or, for older signatures, in the file's tail)
+                sig_start = _find_signature(mm, MAGIC, NONCE_SIZE, MAX_SIG_WINDOW)
+                if sig_start == -1:
+                    raise GiftSignatureError("No valid signature found")
                 
-            # Convert decrypted blocks back to bytes
-            decrypted_data = bytes.fromhex(list_to_string(decrypted_blocks))
+                # Extract signature components
+                sig_len, nonce = struct.unpack_from(f'<Q{NONCE_SIZE}s', mm, sig_start + len(MAGIC))
+                pos = sig_start + len(MAGIC) + 8 + NONCE_SIZE
+                tag = mm[pos+sig_len:pos+sig_len+16]
+                
+                with memoryview(mm) as mv:
+                    encrypted_data = mv[pos:pos+sig_len]
+                    document_content = mv[:sig_start]
+                    open_signature = _aes_gcm_open if backend == 'aes_ni' else _gift_cofb_open
+                    try:
+                        decrypted_data = open_signature(
+                            author_key_hex, nonce, encrypted_data, tag,
+                            document_content)
+                    finally:
+                        # Release the views even when verification fails, as
+                        # the map cannot be closed while they are exported
+                        encrypted_data.release()
+                        document_content.release()
             
             # Parse metadata
             pos = 0
-            timestamp_len = struct.unpack('<H', decrypted_data[pos:pos+2])[0]
+            timestamp_len, = struct.unpack_from('<H', decrypted_data, pos)
             pos += 2
             timestamp = decrypted_data[pos:pos+timestamp_len].decode('utf-8')
             pos += timestamp_len
             
-            author_id_len = struct.unpack('<H', decrypted_data[pos:pos+2])[0]
+            author_id_len, = struct.unpack_from('<H', decrypted_data, pos)
             pos += 2
             author_id = decrypted_data[pos:pos+author_id_len].decode('utf-8')
             
@@ -180,6 +255,58 @@ def verify_gift_document_signature(filepath, author_key_hex):
     except Exception as e:
         raise GiftSignatureError(f"Verification failed: {str(e)}")
 
+def _gift_cofb_open(author_key_hex, nonce, encrypted_data, tag, document_content):
+    """
+    Decrypts and verifies the metadata under GIFT-COFB, streaming the document
+    content in block by block as associated data
+    
+    Returns:
+        The decrypted metadata bytes; raises GiftSignatureError on a bad tag
+    """
+    # Initialize GIFT-COFB
+    gift_cofb = GiftCofb()
+    
+    # Key nibbles and expanded schedule, cached per author key
+    key_list, schedule = _signing_context(author_key_hex)
+    nonce_list = bytes_to_nibbles(nonce)
+    
+    encrypted_blocks = bytes_to_block_list(encrypted_data)
+    if not encrypted_blocks:
+        encrypted_blocks = [[]]
+    
+    # Decrypt and verify using GIFT-COFB
+    decrypted_blocks = gift_cofb.verify(
+        encrypted_blocks,
+        key_list,
+        iter_block_list(document_content),  # Document content as associated data
+        nonce_list,
+        bytes_to_nibbles(tag),
+        schedule
+    )
+    
+    if decrypted_blocks == [-1]:
+        raise GiftSignatureError("Signature verification failed")
+        
+    # Convert decrypted blocks back to bytes
+    return nibbles_to_bytes(decrypted_blocks)
+
+def _aes_gcm_open(author_key_hex, nonce, encrypted_data, tag, document_content):
+    """
+    Decrypts and verifies the metadata under AES-GCM with the document content
+    as associated data
+    
+    Returns:
+        The decrypted metadata bytes; raises GiftSignatureError on a bad tag
+    """
+    decryptor = _aes_gcm(bytes.fromhex(author_key_hex), nonce, tag).decryptor()
+    from cryptography.exceptions import InvalidTag
+    
+    decryptor.authenticate_additional_data(document_content)
+    try:
+        return decryptor.update(encrypted_data) + decryptor.finalize()
+    except InvalidTag:
+        raise GiftSignatureError("Signature verification failed")
+
 def demo_gift_document_integrity():
     """
     Demonstrates the document integrity and authorship verification system using GIFT-COFB
@@ -2,8 +2,14 @@
 Module to implement the GIFT-128 bit sliced block cipher for use
 in GIFT-COFB class
 """
+import ctypes
+import functools
+import os
+
 from utils import *
 
+__all__ = ['Gift128BitSliced', 'round_constants']
+
 
 # define round constants
 round_constants = [0x01, 0x03, 0x07, 0x0F, 0x1F, 0x3E, 0x3D, 0x3B,
@@ -14,6 +20,131 @@ round_constants = [0x01, 0x03, 0x07, 0x0F, 0x1F, 0x3E, 0x3D, 0x3B,
                    0x34, 0x29, 0x12, 0x24, 0x08, 0x11, 0x22, 0x04]
 
 
+# new bit positions in each nibble for each cell in the cipher state
+_bit_positions = [[0, 3, 2, 1], [1, 0, 3, 2],
+                  [2, 1, 0, 3], [3, 2, 1, 0]]
+
+
+def _build_perm_tables():
+    """
+    Function to precompute the PermBits step as byte lookup tables.
+    Bit 4 * i + j of a cell moves to bit i + 8 * _bit_positions[cell][j];
+    for every cell and every byte of the cell we store the permuted value
+    of each of the 256 possible byte values.
+    Returns: _perm_tables[cell][byte_index][byte_value]
+    """
+
+    tables = []
+    for cell in range(0, 4):
+        cell_tables = []
+        for byte_index in range(0, 4):
+            table = []
+            for value in range(0, 256):
+                new_value = 0
+                for k in range(0, 8):
+                    if value >> k & 0x1:
+                        bit = 8 * byte_index + k
+                        new_value |= 1 << (bit // 4 + 8 *
+                                           _bit_positions[cell][bit % 4])
+                table.append(new_value)
+            cell_tables.append(tuple(table))
+        tables.append(tuple(cell_tables))
+
+    return tuple(tables)
+
+
+_perm_tables = _build_perm_tables()
+
+
+def _build_perm_masks():
+    """
+    Function to precompute the PermBits step as shift-and-mask pairs, for
+    use on many blocks at once (see Gift128BitSliced._encrypt_blocks_packed).
+    Bits of a cell that move the same distance are grouped under one mask,
+    so each cell is permuted with one mask and shift per distance.
+    Returns: _perm_masks[cell] = tuple of (shift, mask), shift > 0 meaning
+    a left shift
+    """
+
+    masks = []
+    for cell in range(0, 4):
+        by_shift = {}
+        for bit in range(0, 32):
+            shift = bit // 4 + 8 * _bit_positions[cell][bit % 4] - bit
+            by_shift[shift] = by_shift.get(shift, 0) | 1 << bit
+        masks.append(tuple(sorted(by_shift.items())))
+
+    return tuple(masks)
+
+
+_perm_masks = _build_perm_masks()
+
+
+@functools.lru_cache(maxsize=32)
+def _lane_constants(lanes, schedule):
+    """
+    Function to replicate the 32 bit constants used by the round function
+    into every 32 bit lane of a packed multi-block state.
+    Parameters: the number of lanes (blocks) and the key schedule.
+    Returns: the all-ones value, the replicated _perm_masks and the
+    replicated (U, V, round constant) schedule
+    """
+
+    # 0x00000001 repeated in every lane, multiplying by it copies a 32 bit
+    # value into every lane
+    repeat = int.from_bytes(b'\x00\x00\x00\x01' * lanes, 'big')
+
+    ones = 0xFFFFFFFF * repeat
+    masks = tuple(tuple((shift, mask * repeat) for shift, mask in cell)
+                  for cell in _perm_masks)
+    round_keys = tuple((U * repeat, V * repeat, round_constant * repeat)
+                       for U, V, round_constant in schedule)
+
+    return ones, masks, round_keys
+
+
+def _load_native_gift128():
+    """
+    Function to load the optional C implementation (_gift128.c, built as
+    _gift128.so next to this file - see README.txt) through ctypes.
+    Returns: the loaded library, or None to use the pure Python code
+    (also when the library is stale and lacks one of the functions)
+    """
+
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        '_gift128.so')
+    try:
+        library = ctypes.CDLL(path)
+
+        round_keys = ctypes.POINTER(ctypes.c_uint32)
+        library.gift128_encrypt_blocks.argtypes = [
+            round_keys, ctypes.c_char_p, ctypes.c_char_p, ctypes.c_size_t]
+        library.gift128_encrypt_blocks.restype = None
+        library.gift128_encrypt_ctr_batch.argtypes = [
+            round_keys, ctypes.c_char_p, ctypes.c_char_p, ctypes.c_size_t]
+        library.gift128_encrypt_ctr_batch.restype = None
+    except (OSError, AttributeError):
+        return None
+
+    return library
+
+
+_native_gift128 = _load_native_gift128()
+
+
+@functools.lru_cache(maxsize=32)
+def _native_round_keys(schedule):
+    """
+    Function to lay a key schedule out as the C uint32_t[80] round key
+    array (U, V for each round; the C code adds the round constants).
+    Parameters: the key schedule returned by expand_key.
+    Returns: ctypes array of the 80 round key words
+    """
+
+    words = [word for U, V, _ in schedule for word in (U, V)]
+    return (ctypes.c_uint32 * len(words))(*words)
+
+
 class Gift128BitSliced:
     def __init__(self):
         # initialise empty state and key states
@@ -27,23 +158,138 @@ class Gift128BitSliced:
         Returns: Ciphertext
         """
 
-        # initialise the cipher and key state
-        self.initialise(plaintext, input_key)
+        return self.encrypt_block_with_schedule(plaintext,
+                                                self.expand_key(input_key))
+
+    def encrypt_block_with_schedule(self, plaintext, schedule):
+        """
+        Method to run the GIFT-128 (bit-sliced) BC with an already expanded
+        key, so callers encrypting many blocks under one key only run the
+        key schedule once.
+        Parameters: The plaintext block (128 bits) and the key schedule
+        returned by expand_key
+        Returns: Ciphertext
+        """
+
+        if _native_gift128 is not None:
+            ciphertext = ctypes.create_string_buffer(16)
+            _native_gift128.gift128_encrypt_blocks(
+                _native_round_keys(schedule), bytes(plaintext), ciphertext, 1)
+            return bytes_to_nibbles(ciphertext.raw)
+
+        # initialise the cipher state
+        self.initialise(plaintext, [0] * 16)
 
         # run the round function for 40 rounds
-        for i in range(0, 40):
+        for round_key in schedule:
             self.sub_cells()
             self.perm_bits()
-            self.add_round_key_and_constant(i)
-
-            # update the key state
-            self.key_update()
+            self.add_round_key_and_constant(round_key)
 
         # convert ciphertext to hex to return
         ciphertext = self.state_to_hex()
 
         return ciphertext
 
+    def _encrypt_blocks_packed(self, plaintexts, schedule):
+        """
+        Method to run the GIFT-128 (bit-sliced) BC on many independent
+        blocks at once. Cell i of every block is packed into one Python int
+        (one 32 bit lane per block), so each step of the round function
+        is a handful of big-int operations for the whole batch instead of
+        a full round function per block.
+        Parameters: non-empty list of plaintext blocks (each 16 byte values,
+        as a list or bytes) and the key schedule returned by expand_key
+        Returns: the ciphertext blocks concatenated as bytes
+        """
+
+        lanes = len(plaintexts)
+
+        if _native_gift128 is not None:
+            ciphertexts = ctypes.create_string_buffer(16 * lanes)
+            _native_gift128.gift128_encrypt_blocks(
+                _native_round_keys(schedule),
+                b''.join(bytes(block) for block in plaintexts),
+                ciphertexts, lanes)
+            return ciphertexts.raw
+
+        ones, masks, round_keys = _lane_constants(lanes, schedule)
+
+        # pack cell i of every block into lane order (block 0 highest)
+        s0, s1, s2, s3 = [
+            int.from_bytes(b''.join(bytes(block[i:i + 4])
+                                    for block in plaintexts), 'big')
+            for i in range(0, 16, 4)]
+
+        for U, V, round_constant in round_keys:
+            # sub cells (as in sub_cells, with NOT kept inside the lanes)
+            s1 ^= s0 & s2
+            s0 ^= s1 & s3
+            s2 ^= s0 | s1
+            s3 ^= s2
+            s1 ^= s3
+            s3 ^= ones
+            s2 ^= s0 & s1
+            s0, s3 = s3, s0
+
+            # perm bits, one shifted mask per move distance
+            state = []
+            for value, cell_masks in zip((s0, s1, s2, s3), masks):
+                permuted = 0
+                for shift, mask in cell_masks:
+                    if shift >= 0:
+                        permuted |= (value & mask) << shift
+                    else:
+                        permuted |= (value & mask) >> -shift
+                state.append(permuted)
+            s0, s1, s2, s3 = state
+
+            # add round key and constant
+            s2 ^= U
+            s1 ^= V
+            s3 ^= round_constant
+
+        # unpack each lane back into its block's 16 bytes
+        cells = [cell.to_bytes(4 * lanes, 'big') for cell in (s0, s1, s2, s3)]
+        return b''.join(cell[i:i + 4]
+                        for i in range(0, 4 * lanes, 4) for cell in cells)
+
+    def encrypt_counter_blocks(self, first_counter, block_count, schedule):
+        """
+        Method to produce a CTR keystream: GIFT-128 of first_counter,
+        first_counter + 1, ... (as 128 bit big-endian blocks, mod 2^128).
+        Parameters: the first counter value (int), the number of blocks and
+        the key schedule returned by expand_key
+        Returns: the keystream bytes (16 * block_count)
+        """
+
+        if _native_gift128 is not None:
+            keystream = ctypes.create_string_buffer(16 * block_count)
+            _native_gift128.gift128_encrypt_ctr_batch(
+                _native_round_keys(schedule),
+                (first_counter % (1 << 128)).to_bytes(16, 'big'),
+                keystream, block_count)
+            return keystream.raw
+
+        if block_count == 0:
+            return b''
+
+        counter_blocks = [
+            ((first_counter + i) % (1 << 128)).to_bytes(16, 'big')
+            for i in range(block_count)]
+        return self._encrypt_blocks_packed(counter_blocks, schedule)
+
+    @staticmethod
+    def expand_key(input_key):
+        """
+        Method to expand the key into the 40 round keys and constants.
+        Results are cached, so repeated calls with the same key are free.
+        Parameters: the input key (16 bytes as a list of decimal values)
+        Returns: tuple of (U, V, round constant) for each of the 40 rounds
+        """
+
+        return _expand_key_cached(tuple(input_key))
+
     def initialise(self, plaintext, key_input):
         """
         Method to initialise the cipher state and key state arrays
@@ -90,51 +336,37 @@ class Gift128BitSliced:
     def perm_bits(self):
         """
         Method to apply bit permutation to cipher state
-        We iterate over all four cells in the cipher state, for each cell we
-        iterate over every nibble, and then every bit in each nibble
-        and apply the bit permutation according to the bit positions 2D array
+        Each cell is permuted one byte at a time through the precomputed
+        _perm_tables (see _build_perm_tables) rather than bit by bit
         Parameters: none
         Returns: none (cipher state attribute updated with
         the bit permutation applied)
         """
 
-        # new bit positions in each nibble for each cell in the cipher state
-        bit_positions = [[0, 3, 2, 1], [1, 0, 3, 2],
-                         [2, 1, 0, 3], [3, 2, 1, 0]]
-
-        # iterate over each cell in the cipher state
         for cell in range(0, 4):
-            new_value = 0
-            # determine new value of the cipher state cell by applying bit
-            # permutation
-
-            # iterate over every nibble in the cell (0-7)
-            for i in range(0, 8):
-                # iterate over each bit in each nibble (0-4) and apply
-                # bit permutation to it
-                for j in range(0, 4):
-                    new_value = new_value | (self.state[cell] >>
-                                             (4 * i + j) & 0x1) << (
-                                            i + 8 * bit_positions[cell][j])
-
-            self.state[cell] = new_value
-
-    def add_round_key_and_constant(self, round_num):
+            value = self.state[cell]
+            table = _perm_tables[cell]
+            self.state[cell] = table[0][value & 0xFF] \
+                | table[1][value >> 8 & 0xFF] \
+                | table[2][value >> 16 & 0xFF] \
+                | table[3][value >> 24 & 0xFF]
+
+    def add_round_key_and_constant(self, round_key):
         """
         Method to apply the round key and round constant to the
         cipher state
-        Parameters: The cipher state S, key state W and round number
+        Parameters: The (U, V, round constant) triple for this round, as
+        produced by expand_key
         Returns: the cipher state after round key and constant applied
         """
 
+        U, V, round_constant = round_key
+
         # add round key
-        self.state[2] ^= (self.key[2] << 16) | self.key[3]  # apply U
-        self.state[1] ^= (self.key[6] << 16) | self.key[7]  # apply V
+        self.state[2] ^= U
+        self.state[1] ^= V
 
         # add round constant
-        # get the round constant and determine 0x800000XY
-        # where XY = = 00c5c4c3c2c1c0
-        round_constant = 0x80000000 | round_constants[round_num]
         self.state[3] = self.state[3] ^ round_constant
 
     def state_to_hex(self):
@@ -145,16 +377,10 @@ class Gift128BitSliced:
         """
 
         ciphertext = []
-        # iterate over each cell in the cipher state
-        for i in range(0, 4):
-            # convert cell to hex, remove the 0x, pad to length 8
-            # and convert to integer representation of hex (0-15)
-            hex_element = hex(self.state[i])[2:]
-            hex_element = hex_element.zfill(8)
-
-            # add hex characters to the ciphertext list
-            for j in hex_element:
-                ciphertext.append(int(j, 16))
+        # split each 32 bit cell into its 8 nibbles, most significant first
+        for cell in self.state:
+            for shift in range(28, -4, -4):
+                ciphertext.append(cell >> shift & 0xF)
 
         return ciphertext
 
@@ -165,17 +391,9 @@ class Gift128BitSliced:
         Returns: none (updates key attribute variable)
         """
 
-        # convert w6 and w7 to bit representation
-        w6_bits = bin(self.key[6])
-        # remove 0b at front and pad to 16 bits
-        w6_bits = w6_bits[2:].zfill(16)
-        w7_bits = bin(self.key[7])
-        # remove 0b at front and pad to 16 bits
-        w7_bits = w7_bits[2:].zfill(16)
-
-        # apply w6 >>> 2 and w7 >>> 12
-        T6 = apply_rotation(w6_bits, 2)
-        T7 = apply_rotation(w7_bits, 12)
+        # apply w6 >>> 2 and w7 >>> 12 (16 bit rotations)
+        T6 = (self.key[6] >> 2 | self.key[6] << 14) & 0xFFFF
+        T7 = (self.key[7] >> 12 | self.key[7] << 4) & 0xFFFF
 
         # apply key schedule
         # key cells shifted left by 2
@@ -187,8 +405,27 @@ class Gift128BitSliced:
         self.key[0] = T6
 
 
-def apply_rotation(bits, num_to_shift):
+@functools.lru_cache(maxsize=32)
+def _expand_key_cached(input_key):
     """
-    Function to apply a
+    Function to run the GIFT-128 key schedule once for a key.
+    Parameters: the input key as a tuple of 16 decimal byte values.
+    Returns: tuple of (U, V, round constant) for each of the 40 rounds
     """
-    return int((bits[-num_to_shift:] + bits[:-num_to_shift]), 2)
\ No newline at end of file
+
+    cipher = Gift128BitSliced()
+    cipher.initialise([0] * 16, input_key)
+
+    schedule = []
+    for i in range(0, 40):
+        U = (cipher.key[2] << 16) | cipher.key[3]
+        V = (cipher.key[6] << 16) | cipher.key[7]
+        # get the round constant and determine 0x800000XY
+        # where XY = = 00c5c4c3c2c1c0
+        round_constant = 0x80000000 | round_constants[i]
+        schedule.append((U, V, round_constant))
+
+        # update the key state
+        cipher.key_update()
+
+    return tuple(schedule)
@@ -5,6 +5,7 @@ GIFT-128 bit sliced version of the GIFT block cipher for use in GIFT-COFB
 
 
 from gift128bitsliced import *
+from utils import *
 
 
 class GiftCofb:
@@ -15,65 +16,34 @@ class GiftCofb:
         # declare n which is the block size (bits)
         self.n = 128
 
-    def encrypt(self, plaintext_blocks, key, associated_data_blocks, nonce):
+    def encrypt(self, plaintext_blocks, key, associated_data_blocks, nonce,
+                schedule=None):
         """
         Method to run GIFT-COFB to produce ciphertext and tag
-        Parameters: the plaintext blocks, key, associated data blocks, nonce.
+        Parameters: the plaintext blocks, key, associated data blocks, nonce,
+        and optionally the key schedule already expanded from the key.
         Returns: the ciphertext and tag
         """
 
         # 1. Initialisation
         ciphertext_blocks = []
 
+        # expand the key once for every GIFT-128 call below
+        if schedule is None:
+            schedule = self.cipher.expand_key(hex_to_decimal(key))
+
         # the nonce is encrypted with GIFT-128 and set as the state
         state = nonce[:]
-        state = self.cipher.encrypt_block(hex_to_decimal(state),
-                                          hex_to_decimal(key))
+        state = self.cipher.encrypt_block_with_schedule(
+            hex_to_decimal(state), schedule)
 
         # truncate state (y[0]) and set to delta
         delta = state[0:16]
 
         # 2. Process associated data blocks
-
-        # iterate over all associated data blocks excluding the last
-        for i in range(0, len(associated_data_blocks) - 1):
-            # L ← 2 · L
-            delta = self.double(delta)
-            # apply ρ1(Y, M) = G· Y ⊕ M
-            state = self.pho1(state, associated_data_blocks[i])
-
-            # xor state with delta (pad delta with 0's)
-            state = xor_bits(state, delta + [0] * 32)
-
-            # encrypt state under GIFT-128
-            state = self.cipher.encrypt_block(hex_to_decimal(state),
-                                              hex_to_decimal(key))
-
-        # L ← 3 · L
-        delta = self.triple(delta)
-
-        # check whether last associated data block is not a full block
-        if len((associated_data_blocks[-1]) * 4) != self.n:
-            # L ← 3 · L if last associated data block is not full
-            delta = self.triple(delta)
-
-        # check whether plaintext is empty
-        if plaintext_blocks == [[]]:
-            # L ← 3^2 · L if plaintext is empty
-            delta = self.triple(delta)
-            delta = self.triple(delta)
-
-        # pad last associated data block (where necessary)
-        associated_data_blocks[-1] = apply_padding(associated_data_blocks[-1],
-                                                   128)
-        # apply ρ1(Y, M) = G· Y ⊕ M
-        state = self.pho1(state, associated_data_blocks[-1])
-
-        # xor state with delta (pad delta with 0's) and encrypt state
-        state = xor_bits(state, delta + [0] * 32)
-
-        state = self.cipher.encrypt_block(hex_to_decimal(state),
-                                          hex_to_decimal(key))
+        state, delta = self.process_associated_data(
+            state, delta, associated_data_blocks, plaintext_blocks == [[]],
+            schedule)
 
         # 3. Process plaintext blocks
 
@@ -88,8 +58,8 @@ class GiftCofb:
 
             # xor state with padded delta and encrypt state
             state = xor_bits(state, delta + [0] * 32)
-            state = self.cipher.encrypt_block(hex_to_decimal(state),
-                                              hex_to_decimal(key))
+            state = self.cipher.encrypt_block_with_schedule(
+                hex_to_decimal(state), schedule)
 
         # check whether plaintext is not empty, i.e. there is a final block
         # to analyse
@@ -113,20 +83,22 @@ class GiftCofb:
             # xor state with padded delta and encrypt state
             state = xor_bits(state, delta + [0] * 32)
 
-            state = self.cipher.encrypt_block(hex_to_decimal(state),
-                                              hex_to_decimal(key))
+            state = self.cipher.encrypt_block_with_schedule(
+                hex_to_decimal(state), schedule)
             
         # tag becomes the current value of state
         tag = state
 
         return ciphertext_blocks, tag
 
-    def verify(self, ciphertext, key, associated_data, nonce, tag_to_verify):
+    def verify(self, ciphertext, key, associated_data, nonce, tag_to_verify,
+               schedule=None):
         """
         Method to verify whether GIFT-COFB tag. If tag is verified, decrypted
         message is returned.
-        Parameters: ciphertext blocks, key, associated data blocks, nonce
-        and the tag to verify.
+        Parameters: ciphertext blocks, key, associated data blocks, nonce,
+        the tag to verify, and optionally the key schedule already expanded
+        from the key.
         Returns: if tag is verified, the plaintext, otherwise returns empty
         plaintext.
         """
@@ -134,55 +106,21 @@ class GiftCofb:
         # 1. Initialisation
         plaintext_blocks = []
 
+        # expand the key once for every GIFT-128 call below
+        if schedule is None:
+            schedule = self.cipher.expand_key(hex_to_decimal(key))
+
         # the nonce is encrypted with GIFT-128 and set as the state
         state = nonce[:]
-        state = self.cipher.encrypt_block(hex_to_decimal(state),
-                                          hex_to_decimal(key))
+        state = self.cipher.encrypt_block_with_schedule(
+            hex_to_decimal(state), schedule)
 
         # truncate state (y[0]) and set to delta
         delta = state[0:16]
 
         # 2. Process associated data blocks
-
-        # iterate over all associated data blocks excluding the last
-        for i in range(0, len(associated_data) - 1):
-            # L ← 2 · L
-            delta = self.double(delta)
-
-            # apply ρ1(Y, M) = G· Y ⊕ M
-            state = self.pho1(state, associated_data[i])
-
-            # xor state with delta (pad delta with 0's)
-            state = xor_bits(state, delta + [0] * 32)
-
-            # encrypt state under GIFT-128
-            state = self.cipher.encrypt_block(hex_to_decimal(state),
-                                              hex_to_decimal(key))
-
-        # L ← 3 · L
-        delta = self.triple(delta)
-
-        # check whether last associated data block is not a full block
-        if len((associated_data[-1]) * 4) != self.n:
-            # L ← 3 · L if last associated data block is not full
-            delta = self.triple(delta)
-
-        # check whether plaintext is empty
-        if ciphertext == [[]]:
-            # L ← 3^2 · L if plaintext is empty
-            delta = self.triple(delta)
-            delta = self.triple(delta)
-
-        # pad last associated data block (where necessary)
-        associated_data[-1] = apply_padding(associated_data[-1], 128)
-
-        # apply ρ1(Y, M) = G· Y ⊕ M
-        state = self.pho1(state, associated_data[-1])
-
-        # xor state with delta (pad delta with 0's) and encrypt state
-        state = xor_bits(state, delta + [0] * 32)
-        state = self.cipher.encrypt_block(hex_to_decimal(state),
-                                          hex_to_decimal(key))
+        state, delta = self.process_associated_data(
+            state, delta, associated_data, ciphertext == [[]], schedule)
 
         # 3. Process plaintext blocks
 
@@ -197,8 +135,8 @@ class GiftCofb:
 
             # xor state with padded delta and encrypt state
             state = xor_bits(state, delta + [0] * 32)
-            state = self.cipher.encrypt_block(hex_to_decimal(state),
-                                              hex_to_decimal(key))
+            state = self.cipher.encrypt_block_with_schedule(
+                hex_to_decimal(state), schedule)
 
         # check whether plaintext is not empty, i.e. there is a final block
         # to analyse
@@ -227,8 +165,8 @@ class GiftCofb:
 
             # xor state with padded delta and encrypt state
             state = xor_bits(state, delta + [0] * 32)
-            state = self.cipher.encrypt_block(hex_to_decimal(state),
-                                              hex_to_decimal(key))
+            state = self.cipher.encrypt_block_with_schedule(
+                hex_to_decimal(state), schedule)
 
         # tag becomes the current value of state
         tag = state
@@ -240,6 +178,67 @@ class GiftCofb:
         else:
             return [-1]
 
+    def process_associated_data(self, state, delta, associated_data_blocks,
+                                message_empty, schedule):
+        """
+        Method to absorb the associated data into the state. The blocks may
+        be any iterable (e.g. a generator over a file), so the associated
+        data never has to be held in memory all at once.
+        Parameters: the state, delta, associated data blocks, whether the
+        message is empty, and the expanded GIFT-128 key schedule.
+        Returns: the updated state and delta.
+        """
+
+        blocks = iter(associated_data_blocks)
+
+        # hold one block back so the last block can be told apart - no
+        # blocks at all is treated as a single empty block
+        block = next(blocks, [])
+
+        # iterate over all associated data blocks excluding the last
+        for next_block in blocks:
+            # L ← 2 · L
+            delta = self.double(delta)
+
+            # apply ρ1(Y, M) = G· Y ⊕ M
+            state = self.pho1(state, block)
+
+            # xor state with delta (pad delta with 0's)
+            state = xor_bits(state, delta + [0] * 32)
+
+            # encrypt state under GIFT-128
+            state = self.cipher.encrypt_block_with_schedule(
+                hex_to_decimal(state), schedule)
+
+            block = next_block
+
+        # L ← 3 · L
+        delta = self.triple(delta)
+
+        # check whether last associated data block is not a full block
+        if len(block) * 4 != self.n:
+            # L ← 3 · L if last associated data block is not full
+            delta = self.triple(delta)
+
+        # check whether plaintext is empty
+        if message_empty:
+            # L ← 3^2 · L if plaintext is empty
+            delta = self.triple(delta)
+            delta = self.triple(delta)
+
+        # pad last associated data block (where necessary)
+        block = apply_padding(block, 128)
+
+        # apply ρ1(Y, M) = G· Y ⊕ M
+        state = self.pho1(state, block)
+
+        # xor state with delta (pad delta with 0's) and encrypt state
+        state = xor_bits(state, delta + [0] * 32)
+        state = self.cipher.encrypt_block_with_schedule(
+            hex_to_decimal(state), schedule)
+
+        return state, delta
+
     def pho1(self, Y, M):
         """
         Method to apply ρ1 function.
@@ -372,7 +371,7 @@ if __name__ == "__main__":
     # Decrypt and verify
     decrypted = gift_cofb.verify(ciphertext, key_list, [ad_list], nonce_list, tag)
     if decrypted != [-1]:
-        decrypted_str = bytes.fromhex(list_to_string(decrypted)).decode('utf-8').rstrip(chr(0))
+        decrypted_str = nibbles_to_bytes(decrypted).decode('utf-8').rstrip(chr(0))
         print(f"Plaintext: {decrypted_str}, Len: {len(decrypted_str)}")
         print("Success!")
     else:
@@ -1,7 +1,37 @@
 #!/usr/bin/env python3
 
+import hmac
+from concurrent.futures import ProcessPoolExecutor
+
 from gift_cofb import GiftCofb
-from utils import hex_to_decimal, decimal_to_hex, string_to_list
+from gift128bitsliced import Gift128BitSliced
+from utils import hex_to_decimal, decimal_to_hex, bytes_to_nibbles, nibbles_to_bytes
+
+
+# PKCS7 pad strings indexed by pad length, built once instead of per call
+_PKCS7_PADDING = [bytes([i]) * i for i in range(17)]
+
+# 128-bit zero nonce (as nibbles) used for single-block GIFT-COFB calls
+_ZERO_NONCE_128 = [0] * 32
+
+# Number of counter blocks encrypted per GIFT-128 batch (and per worker task)
+CTR_CHUNK_BLOCKS = 256
+
+
+def _xor_bytes(a, b):
+    """XOR two equal-length byte strings as one big integer"""
+    return (int.from_bytes(a, 'big') ^ int.from_bytes(b, 'big')).to_bytes(len(a), 'big')
+
+
+def _ctr_keystream(key, first_counter, block_count):
+    """
+    Encrypt block_count consecutive counter blocks under GIFT-128 in one
+    batch. Module-level so ProcessPoolExecutor workers can run it.
+    """
+    cipher = Gift128BitSliced()
+    schedule = cipher.expand_key(key)
+    return cipher.encrypt_counter_blocks(first_counter, block_count, schedule)
+
 
 class GiftCofbModes:
     def __init__(self):
@@ -11,31 +41,38 @@ class GiftCofbModes:
     def pad_data(data, block_size):
         """Apply PKCS7 padding to the data"""
         padding_length = block_size - (len(data) % block_size)
-        padding = bytes([padding_length] * padding_length)
-        return data + padding
+        if padding_length < len(_PKCS7_PADDING):
+            return data + _PKCS7_PADDING[padding_length]
+        # block sizes above 16 bytes are not in the table
+        return data + bytes([padding_length]) * padding_length
 
     @staticmethod
     def unpad_data(padded_data):
         """Remove PKCS7 padding from the data"""
         padding_length = padded_data[-1]
-        if padding_length == 0 or padding_length > 16:
-            raise ValueError("Invalid padding")
-        if padded_data[-padding_length:] != bytes([padding_length] * padding_length):
+        # Check range and pad bytes together, with a constant-time compare,
+        # so timing does not reveal which check failed (padding oracle)
+        in_range = 0 < padding_length <= 16
+        checked_length = padding_length if in_range else 16
+        pad_ok = hmac.compare_digest(padded_data[-checked_length:],
+                                     _PKCS7_PADDING[checked_length])
+        if not (pad_ok and in_range):
             raise ValueError("Invalid padding")
         return padded_data[:-padding_length]
 
-    def _process_block(self, key, block):
+    def _process_block(self, key_list, nonce_list, block, schedule):
         """Process a single block using GIFT-COFB"""
-        # Convert block to proper format for GIFT-COFB
-        block_list = string_to_list(block.hex())
-        key_list = string_to_list(key.hex())
-        # Use a zero nonce and associated data for block encryption
-        nonce = string_to_list("0" * 32)  # 128-bit zero nonce
+        # Convert block to proper format for GIFT-COFB (byte lookup table,
+        # no hex round trip); key, nonce and key schedule come pre-converted
+        # by the caller
+        block_list = bytes_to_nibbles(block)
+        # Fresh empty associated data each call, as GIFT-COFB pads it in place
         empty_ad = []
         
-        ciphertext, _ = self.cipher.encrypt([block_list], key_list, [empty_ad], nonce)
+        ciphertext, _ = self.cipher.encrypt([block_list], key_list, [empty_ad], nonce_list,
+                                            schedule=schedule)
         # Convert back to bytes
-        return bytes.fromhex(''.join([f"{x:x}" for x in ciphertext[0]]))
+        return nibbles_to_bytes(ciphertext[0])
 
     def cbc_encrypt(self, key, iv, plaintext):
         """Encrypt using GIFT-COFB in CBC mode"""
@@ -45,20 +82,22 @@ class GiftCofbModes:
             raise ValueError("IV must be 16 bytes")
 
         block_size = 16
+        key_list = bytes_to_nibbles(key)
+        schedule = self.cipher.cipher.expand_key(hex_to_decimal(key_list))
         padded_plaintext = self.pad_data(plaintext, block_size)
-        ciphertext = b''
+        out = bytearray(len(padded_plaintext))
         previous_block = iv
 
         for i in range(0, len(padded_plaintext), block_size):
             block = padded_plaintext[i:i + block_size]
             # XOR with previous ciphertext block or IV
-            xored = bytes(a ^ b for a, b in zip(block, previous_block))
+            xored = _xor_bytes(block, previous_block)
             # Encrypt block using GIFT-COFB
-            encrypted = self._process_block(key, xored)
-            ciphertext += encrypted
+            encrypted = self._process_block(key_list, _ZERO_NONCE_128, xored, schedule)
+            out[i:i + block_size] = encrypted
             previous_block = encrypted
 
-        return ciphertext
+        return bytes(out)
 
     def cbc_decrypt(self, key, iv, ciphertext):
         """Decrypt using GIFT-COFB in CBC mode"""
@@ -70,19 +109,21 @@ class GiftCofbModes:
             raise ValueError("Ciphertext length must be multiple of 16")
 
         block_size = 16
-        plaintext = b''
+        key_list = bytes_to_nibbles(key)
+        schedule = self.cipher.cipher.expand_key(hex_to_decimal(key_list))
+        out = bytearray(len(ciphertext))
         previous_block = iv
 
         for i in range(0, len(ciphertext), block_size):
             current_block = ciphertext[i:i + block_size]
             # Decrypt block using GIFT-COFB
-            decrypted = self._process_block(key, current_block)
+            decrypted = self._process_block(key_list, _ZERO_NONCE_128, current_block, schedule)
             # XOR with previous block or IV
-            plaintext_block = bytes(a ^ b for a, b in zip(decrypted, previous_block))
-            plaintext += plaintext_block
+            plaintext_block = _xor_bytes(decrypted, previous_block)
+            out[i:i + block_size] = plaintext_block
             previous_block = current_block
 
-        return self.unpad_data(plaintext)
+        return self.unpad_data(bytes(out))
 
     def ofb_encrypt(self, key, iv, plaintext):
         """Encrypt using GIFT-COFB in OFB mode"""
@@ -92,20 +133,22 @@ class GiftCofbModes:
             raise ValueError("IV must be 16 bytes")
 
         block_size = 16
+        key_list = bytes_to_nibbles(key)
+        schedule = self.cipher.cipher.expand_key(hex_to_decimal(key_list))
         padded_plaintext = self.pad_data(plaintext, block_size)
-        ciphertext = b''
+        out = bytearray(len(padded_plaintext))
         previous_block = iv
 
         for i in range(0, len(padded_plaintext), block_size):
             # Generate keystream using GIFT-COFB
-            keystream = self._process_block(key, previous_block)
+            keystream = self._process_block(key_list, _ZERO_NONCE_128, previous_block, schedule)
             # XOR with plaintext block
             block = padded_plaintext[i:i + block_size]
-            encrypted_block = bytes(a ^ b for a, b in zip(block, keystream))
-            ciphertext += encrypted_block
+            encrypted_block = _xor_bytes(block, keystream)
+            out[i:i + block_size] = encrypted_block
             previous_block = keystream
 
-        return ciphertext
+        return bytes(out)
 
     def ofb_decrypt(self, key, iv, ciphertext):
         """Decrypt using GIFT-COFB in OFB mode"""
@@ -117,16 +160,56 @@ class GiftCofbModes:
             raise ValueError("Ciphertext length must be multiple of 16")
 
         block_size = 16
-        plaintext = b''
+        key_list = bytes_to_nibbles(key)
+        schedule = self.cipher.cipher.expand_key(hex_to_decimal(key_list))
+        out = bytearray(len(ciphertext))
         previous_block = iv
 
         for i in range(0, len(ciphertext), block_size):
             # Generate keystream using GIFT-COFB
-            keystream = self._process_block(key, previous_block)
+            keystream = self._process_block(key_list, _ZERO_NONCE_128, previous_block, schedule)
             # XOR with ciphertext block
             block = ciphertext[i:i + block_size]
-            decrypted_block = bytes(a ^ b for a, b in zip(block, keystream))
-            plaintext += decrypted_block
+            decrypted_block = _xor_bytes(block, keystream)
+            out[i:i + block_size] = decrypted_block
             previous_block = keystream
 
-        return self.unpad_data(plaintext)
\ No newline at end of file
+        return self.unpad_data(bytes(out))
+
+    def ctr_encrypt(self, key, iv, plaintext, workers=None):
+        """
+        Encrypt using GIFT-128 in CTR mode. The keystream is GIFT-128 of
+        iv, iv + 1, ... (mod 2^128), so unlike CBC/OFB every block is
+        independent: counters are encrypted CTR_CHUNK_BLOCKS at a time with
+        the multi-block Gift128BitSliced.encrypt_counter_blocks, and with
+        workers > 1 the chunks are spread over a process pool. No padding is
+        needed.
+        """
+        if len(key) != 16:
+            raise ValueError("Key must be 16 bytes")
+        if len(iv) != 16:
+            raise ValueError("IV must be 16 bytes")
+
+        block_size = 16
+        chunk_size = CTR_CHUNK_BLOCKS * block_size
+        counter = int.from_bytes(iv, 'big')
+        key = tuple(key)
+
+        # (key, first counter, block count) for each chunk of the input
+        tasks = [
+            (key, counter + i // block_size,
+             -(-min(chunk_size, len(plaintext) - i) // block_size))
+            for i in range(0, len(plaintext), chunk_size)]
+
+        if workers is not None and workers > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                keystreams = executor.map(_ctr_keystream, *zip(*tasks))
+                keystream = b''.join(keystreams)
+        else:
+            keystream = b''.join(_ctr_keystream(*task) for task in tasks)
+
+        return _xor_bytes(plaintext, keystream[:len(plaintext)])
+
+    def ctr_decrypt(self, key, iv, ciphertext, workers=None):
+        """Decrypt using GIFT-128 in CTR mode (the same operation as encrypt)"""
+        return self.ctr_encrypt(key, iv, ciphertext, workers)
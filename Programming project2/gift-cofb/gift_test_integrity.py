@@ -176,6 +176,78 @@ class TestGiftDocumentIntegrity(unittest.TestCase):
         self.assertTrue(is_valid)
         self.assertEqual(author, self.author_id)
 
+    def test_aes_backend(self):
+        """Test signing and verification with the AES-GCM backend"""
+        try:
+            import cryptography
+        except ImportError:
+            self.skipTest("cryptography package not installed")
+        
+        content = b"Test content for the AES-GCM backend."
+        filepath = self.create_test_file(content, "aes_test.doc")
+        
+        create_gift_document_signature(
+            filepath,
+            self.author_key,
+            self.author_id,
+            backend='aes_ni'
+        )
+        
+        is_valid, author, timestamp = verify_gift_document_signature(
+            filepath,
+            self.author_key,
+            backend='aes_ni'
+        )
+        
+        self.assertTrue(is_valid)
+        self.assertEqual(author, self.author_id)
+        
+        # A GIFT-COFB verifier finds no GIFT-COFB signature
+        with self.assertRaises(GiftSignatureError):
+            verify_gift_document_signature(filepath, self.author_key)
+        
+        # Tampering is detected
+        with open(filepath, 'r+b') as f:
+            f.seek(5)
+            f.write(b"modified")
+        
+        with self.assertRaises(GiftSignatureError):
+            verify_gift_document_signature(filepath, self.author_key, backend='aes_ni')
+
+    def test_document_starting_with_magic(self):
+        """Test a document whose content begins with the signature magic number"""
+        content = b"GIFT_SIG" + b" looks like a signature header but is document content."
+        filepath = self.create_test_file(content, "magic_test.doc")
+        
+        create_gift_document_signature(filepath, self.author_key, self.author_id)
+        
+        is_valid, author, timestamp = verify_gift_document_signature(
+            filepath,
+            self.author_key
+        )
+        
+        self.assertTrue(is_valid)
+        self.assertEqual(author, self.author_id)
+
+    def test_legacy_signature_without_footer(self):
+        """Test verification of a signature written before the length + magic footer"""
+        content = b"Document signed with the footer-less signature format."
+        filepath = self.create_test_file(content, "legacy_test.doc")
+        
+        create_gift_document_signature(filepath, self.author_key, self.author_id)
+        
+        # Strip the 16 byte footer (8 byte length + 8 byte magic number)
+        with open(filepath, 'r+b') as f:
+            f.truncate(os.path.getsize(filepath) - 16)
+        
+        is_valid, author, timestamp = verify_gift_document_signature(
+            filepath,
+            self.author_key
+        )
+        
+        self.assertTrue(is_valid)
+        self.assertEqual(author, self.author_id)
+
 def run_integrity_tests():
     """Run the test suite and print results"""
     print("Starting GIFT-COFB Document Integrity Test Suite")
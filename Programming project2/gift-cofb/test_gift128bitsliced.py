@@ -0,0 +1,101 @@
+import os
+import unittest
+import gift128bitsliced
+from gift128bitsliced import Gift128BitSliced
+from utils import nibbles_to_bytes
+
+class TestGift128BitSliced(unittest.TestCase):
+    def setUp(self):
+        """Set up a cipher and a random key before each test"""
+        self.cipher = Gift128BitSliced()
+        self.key = list(os.urandom(16))
+        self.schedule = self.cipher.expand_key(self.key)
+
+    def reference_keystream(self, first_counter, block_count):
+        """Helper method to build a CTR keystream one encrypt_block call at a time"""
+        return b''.join(
+            nibbles_to_bytes(self.cipher.encrypt_block(
+                list(((first_counter + i) % 2**128).to_bytes(16, 'big')),
+                self.key))
+            for i in range(block_count))
+
+    def test_batch_matches_encrypt_block(self):
+        """Test the multi-block core against per-block encryption"""
+        # a batch of one, uneven lane counts and a partial 16-block lane group
+        for block_count in (1, 3, 16, 37):
+            blocks = [list(os.urandom(16)) for _ in range(block_count)]
+            self.assertEqual(
+                self.cipher._encrypt_blocks_packed(blocks, self.schedule),
+                b''.join(nibbles_to_bytes(self.cipher.encrypt_block(block, self.key))
+                         for block in blocks))
+
+    def test_counter_blocks_match_encrypt_block(self):
+        """Test the batched CTR keystream against per-block encryption"""
+        first_counter = int.from_bytes(os.urandom(16), 'big')
+
+        # a batch of one, uneven lane counts and a partial 16-block lane group
+        for block_count in (1, 3, 16, 37):
+            self.assertEqual(
+                self.cipher.encrypt_counter_blocks(first_counter, block_count, self.schedule),
+                self.reference_keystream(first_counter, block_count))
+
+    def test_counter_wraps_past_2_128(self):
+        """Test that the counter wraps mod 2^128 inside a batch"""
+        first_counter = 2**128 - 5
+
+        keystream = self.cipher.encrypt_counter_blocks(first_counter, 10, self.schedule)
+
+        self.assertEqual(keystream, self.reference_keystream(first_counter, 10))
+        self.assertEqual(keystream[5 * 16:], self.reference_keystream(0, 5))
+
+    def test_zero_counter_blocks(self):
+        """Test that asking for no blocks gives an empty keystream"""
+        self.assertEqual(self.cipher.encrypt_counter_blocks(1, 0, self.schedule), b'')
+
+    def test_native_matches_python(self):
+        """Test the optional C core (_gift128.so) against the pure Python code"""
+        native = gift128bitsliced._native_gift128
+        if native is None:
+            self.skipTest("_gift128.so not built")
+
+        block = list(os.urandom(16))
+        blocks = [list(os.urandom(16)) for _ in range(37)]
+        first_counter = 2**128 - 5
+
+        def run_all():
+            return (self.cipher.encrypt_block_with_schedule(block, self.schedule),
+                    self.cipher._encrypt_blocks_packed(blocks, self.schedule),
+                    self.cipher.encrypt_counter_blocks(first_counter, 37, self.schedule))
+
+        native_results = run_all()
+        gift128bitsliced._native_gift128 = None
+        try:
+            python_results = run_all()
+        finally:
+            gift128bitsliced._native_gift128 = native
+
+        self.assertEqual(native_results, python_results)
+
+def run_gift128_tests():
+    """Run the test suite and print results"""
+    print("Starting GIFT-128 Bit-Sliced Test Suite")
+    print("-" * 50)
+
+    # Create test suite
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestGift128BitSliced)
+
+    # Run tests with detailed output
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    # Print summary
+    print("\nTest Summary:")
+    print(f"Tests Run: {result.testsRun}")
+    print(f"Failures: {len(result.failures)}")
+    print(f"Errors: {len(result.errors)}")
+
+    return result.wasSuccessful()
+
+if __name__ == '__main__':
+    success = run_gift128_tests()
+    exit(0 if success else 1)
@@ -1,5 +1,7 @@
 
-from gift_cofb_modes import GiftCofbModes
+from gift_cofb_modes import GiftCofbModes, CTR_CHUNK_BLOCKS
+from gift128bitsliced import Gift128BitSliced
+from utils import nibbles_to_bytes
 import os
 import sys
 
@@ -56,16 +58,57 @@ def test_encryption_mode(mode_name, encrypt_func, decrypt_func):
         traceback.print_exc()
         return False
 
+def test_ctr_workers(gift_modes):
+    """
+    Check CTR mode, with and without a process pool, against a keystream
+    built one GIFT-128 encrypt_block call per counter value
+    """
+    print("\n=== Testing CTR Mode with workers=2 ===")
+    
+    try:
+        key = os.urandom(16)
+        # counter wraps past 2^128 in the first chunk
+        iv = (2**128 - 3).to_bytes(16, 'big')
+        # more than two chunks, ending in a partial block
+        plaintext = os.urandom(2 * CTR_CHUNK_BLOCKS * 16 + 7)
+        
+        cipher = Gift128BitSliced()
+        keystream = b''.join(
+            nibbles_to_bytes(cipher.encrypt_block(
+                list(((2**128 - 3 + i) % 2**128).to_bytes(16, 'big')), list(key)))
+            for i in range(-(-len(plaintext) // 16)))
+        expected = bytes(p ^ k for p, k in zip(plaintext, keystream))
+        
+        ciphertext = gift_modes.ctr_encrypt(key, iv, plaintext)
+        parallel_ciphertext = gift_modes.ctr_encrypt(key, iv, plaintext, workers=2)
+        decrypted = gift_modes.ctr_decrypt(key, iv, parallel_ciphertext, workers=2)
+        
+        if ciphertext == expected and parallel_ciphertext == expected and \
+                decrypted == plaintext:
+            print("\nCTR (workers=2) test PASSED ✓")
+            return True
+        print("\nCTR (workers=2) test FAILED ✗")
+        return False
+            
+    except Exception as e:
+        print("\nCTR (workers=2) test FAILED ✗")
+        print(f"Error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return False
+
 def main():
     gift_modes = GiftCofbModes()
     test_modes = [
         ("CBC", gift_modes.cbc_encrypt, gift_modes.cbc_decrypt),
-        ("OFB", gift_modes.ofb_encrypt, gift_modes.ofb_decrypt)
+        ("OFB", gift_modes.ofb_encrypt, gift_modes.ofb_decrypt),
+        ("CTR", gift_modes.ctr_encrypt, gift_modes.ctr_decrypt)
     ]
     
     results = []
     for mode_name, encrypt_func, decrypt_func in test_modes:
         results.append((mode_name, test_encryption_mode(mode_name, encrypt_func, decrypt_func)))
+    results.append(("CTR (workers=2)", test_ctr_workers(gift_modes)))
     
     print("\n=== Final Test Summary ===")
     all_passed = True
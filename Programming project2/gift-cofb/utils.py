@@ -61,6 +61,89 @@ def string_to_list(string_to_convert):
     return converted_list
 
 
+# translation tables mapping each byte value to its high / low nibble
+_HIGH_NIBBLE = bytes(byte >> 4 for byte in range(256))
+_LOW_NIBBLE = bytes(byte & 0xF for byte in range(256))
+
+# number of bytes converted at a time when streaming blocks
+_STREAM_CHUNK_BYTES = 4096
+
+
+def _interleave_nibbles(buf):
+    """
+    Function to split each byte into its two nibbles with C-level
+    bytes.translate and strided slice assignment (no per-byte Python loop).
+    Parameters: the bytes to convert.
+    Returns: bytearray of nibbles (high nibble of each byte first).
+    """
+
+    data = bytes(buf)
+    nibbles = bytearray(2 * len(data))
+    nibbles[0::2] = data.translate(_HIGH_NIBBLE)
+    nibbles[1::2] = data.translate(_LOW_NIBBLE)
+
+    return nibbles
+
+
+def bytes_to_nibbles(buf):
+    """
+    Function to convert raw bytes to a list of 4 bit values using byte
+    translation tables (no hex string and no int(ch, 16) per character).
+    Parameters: the bytes to convert.
+    Returns: list of nibbles (high nibble of each byte first).
+    """
+
+    return list(_interleave_nibbles(buf))
+
+
+def bytes_to_block_list(buf, block_bytes=16):
+    """
+    Function to split raw bytes into blocks of 4 bit values, as consumed by
+    GIFT-COFB, without going through a hex string.
+    Parameters: the bytes to split and the block size in bytes.
+    Returns: list of blocks, each a list of nibbles (high nibble first).
+    """
+
+    nibbles = _interleave_nibbles(buf)
+    step = 2 * block_bytes
+    return [list(nibbles[i:i + step]) for i in range(0, len(nibbles), step)]
+
+
+def iter_block_list(buf, block_bytes=16):
+    """
+    Function to lazily split raw bytes into blocks of 4 bit values, a chunk
+    at a time, so large inputs (e.g. an mmap'd file) are never held as a
+    full list of blocks.
+    Parameters: the bytes to split and the block size in bytes.
+    Returns: generator of blocks, each a list of nibbles.
+    """
+
+    # chunks are a whole number of blocks so no block straddles two chunks
+    chunk_bytes = _STREAM_CHUNK_BYTES - _STREAM_CHUNK_BYTES % block_bytes
+
+    # the view is released once the generator finishes, so the underlying
+    # buffer (e.g. an mmap) can be closed afterwards
+    with memoryview(buf) as view:
+        for i in range(0, len(view), chunk_bytes):
+            yield from bytes_to_block_list(view[i:i + chunk_bytes],
+                                           block_bytes)
+
+
+def nibbles_to_bytes(nibble_list):
+    """
+    Function to pack a list of 4 bit values (or a list of such lists) back
+    into bytes, without going through a hex string.
+    Parameters: the list of nibbles (1D or 2D), of even total length.
+    Returns: the packed bytes.
+    """
+
+    if nibble_list and isinstance(nibble_list[0], list):
+        nibble_list = [nibble for block in nibble_list for nibble in block]
+
+    return bytes(high << 4 | low
+                 for high, low in zip(nibble_list[0::2], nibble_list[1::2]))
+
+
 def convert_to_bits(state):
     """
     Function to convert state or key to bit representation.